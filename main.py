@@ -1,22 +1,65 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from yarapi.api.v1 import open_sea
-from yarapi.api import router as index_router
+from yarapi.api import admin, router as index_router
+from yarapi.config import config
+from yarapi.core.constants import warm_up
+from yarapi.core.jobs import search_jobs
+from yarapi.core.metrics import MetricsMiddleware
+from yarapi.core.post_store import post_store
+from yarapi.core.processor_pool import processor_pool
+from yarapi.core.profiler import SlowRequestMiddleware, slow_request_profiler
+from yarapi.core.tracing import TracingMiddleware
+from yarapi.core.user_cache import user_cache
 from yarapi.utils.env import rename_envs
 from yarapi.utils.swagger import register_custom_swagger
 
 rename_envs()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.preload_datasources:
+        warm_up(config.preload_datasources)
+        processor_pool.open(config.preload_datasources)
+    user_cache.start()
+    search_jobs.start()
+    slow_request_profiler.start()
+    yield
+    slow_request_profiler.stop()
+    await search_jobs.stop()
+    await user_cache.stop()
+    await post_store.flush()
+    await processor_pool.close()
+
+
 app = FastAPI(
     title="Open Sea Search API",
     description="An API to search and process data from various social networks.",
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware, server_timing=config.server_timing)
+if slow_request_profiler.enabled:
+    app.add_middleware(SlowRequestMiddleware, profiler=slow_request_profiler)
+
 app.include_router(open_sea.router, prefix="/v1", tags=["Open Sea Search"])
 app.include_router(index_router, tags=["Index"])
+app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 
 app.openapi = lambda: register_custom_swagger(app)
 
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=3000)
+    from yarapi.server import uvicorn_config
+
+    # the app and its Mongo clients already exist here, so never fork workers
+    if config.web_concurrency > 1:
+        print(
+            "WEB_CONCURRENCY is ignored when running main.py, which serves a "
+            "single process; use `python -m yarapi.server` for several workers"
+        )
+    uvicorn.Server(uvicorn_config(app)).run()
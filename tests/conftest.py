@@ -0,0 +1,34 @@
+"""
+The app connects to Mongo when its modules are imported, so both the
+pymongo and motor clients are replaced by in-memory mongomock clients
+sharing one store before anything from `yarapi` is imported.
+"""
+
+import os
+import uuid
+
+import mongomock
+import mongomock_motor
+import motor.motor_asyncio
+import pymongo
+import pytest
+
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+_client = mongomock.MongoClient()
+pymongo.MongoClient = lambda *args, **kwargs: _client
+motor.motor_asyncio.AsyncIOMotorClient = (
+    lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient(
+        mock_mongo_client=_client
+    )
+)
+
+
+@pytest.fixture
+def collection():
+    """A `BaseCollection` on a fresh, empty collection."""
+    from yarapi.core.database import BaseCollection
+
+    name = f"test_{uuid.uuid4().hex}"
+    yield BaseCollection("yarapi_test", name)
+    _client["yarapi_test"].drop_collection(name)
@@ -0,0 +1,173 @@
+import asyncio
+
+import pytest
+from pymongo.errors import DocumentTooLarge
+
+from yarapi.core.cache import (
+    CachedPayload,
+    CachedResults,
+    LRUTTLCache,
+    MongoCache,
+    TieredCache,
+    build_cache,
+    result_checksum,
+)
+
+POSTS = [{"id": "1", "text": "a"}, {"id": "2", "text": "b"}]
+
+
+def test_mongo_cache_set_and_get(collection):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+        await cache.aset("key", POSTS)
+
+        value, ttl_left, stale = await cache.aget_entry("key")
+        assert value == POSTS
+        assert 0 < ttl_left <= 60
+        assert not stale
+        assert await cache.aget("missing") is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    asyncio.run(run())
+
+
+def test_mongo_cache_sync_and_async_share_entries(collection):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+        cache.set("key", POSTS)
+        assert await cache.aget("key") == POSTS
+        await cache.aset("other", POSTS[:1])
+        assert cache.get("other") == POSTS[:1]
+
+    asyncio.run(run())
+
+
+def test_mongo_cache_stores_payloads_as_blobs(collection):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+        await cache.aset("key", CachedPayload.pack(POSTS, compress=True))
+
+        value = await cache.aget("key")
+        assert isinstance(value, CachedPayload)
+        assert value.count == 2
+        assert value.load() == POSTS
+
+    asyncio.run(run())
+
+
+def test_checksum_does_not_depend_on_storage(collection):
+    async def run():
+        expected = result_checksum(POSTS)
+        assert result_checksum(CachedResults(POSTS)) == expected
+        assert result_checksum(CachedPayload.pack(POSTS)) == expected
+        assert result_checksum(CachedPayload.pack(POSTS, compress=True)) == expected
+
+        cache = MongoCache(collection, default_ttl=60)
+        await cache.aset("key", CachedPayload.pack(POSTS, compress=True))
+        assert result_checksum(await cache.aget("key")) == expected
+
+    asyncio.run(run())
+
+
+def test_mongo_cache_serves_stale_entries_only_as_stale(collection):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+        await cache.aset("key", POSTS, ttl=0, stale_ttl=60)
+
+        value, ttl_left, stale = await cache.aget_entry("key")
+        assert value == POSTS
+        assert stale
+        assert 0 < ttl_left <= 60
+        # plain lookups only return fresh values
+        assert await cache.aget("key") is None
+
+    asyncio.run(run())
+
+
+def test_mongo_cache_ignores_expired_documents(collection):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+        # the TTL reaper may not have removed it yet
+        await cache.aset("key", POSTS, ttl=0, stale_ttl=0)
+        assert await cache.aget_entry("key") == (None, 0, False)
+
+    asyncio.run(run())
+
+
+def test_mongo_cache_skips_documents_too_large(collection, capsys):
+    async def run():
+        cache = MongoCache(collection, default_ttl=60)
+
+        async def replace_one(*args, **kwargs):
+            raise DocumentTooLarge("BSON document too large")
+
+        collection.objects.replace_one = replace_one
+        await cache.aset("key", POSTS)
+        assert await cache.aget("key") is None
+
+    asyncio.run(run())
+    assert "Shared cache write failed" in capsys.readouterr().out
+
+
+def test_tiered_cache_copies_shared_hits_locally(collection):
+    async def run():
+        shared = MongoCache(collection, default_ttl=60)
+        local = LRUTTLCache(maxsize=10, default_ttl=60)
+        cache = TieredCache(local, shared)
+        await shared.aset("key", POSTS)
+
+        assert local.get("key") is None
+        value, ttl_left, stale = await cache.aget_entry("key")
+        assert value == POSTS
+        assert not stale
+        assert local.get("key") == POSTS
+        assert 0 < local.get_with_ttl("key")[1] <= 60
+
+        # the next lookup doesn't reach the shared tier
+        await cache.aget_entry("key")
+        assert shared.stats()["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_tiered_cache_does_not_copy_stale_hits(collection):
+    async def run():
+        shared = MongoCache(collection, default_ttl=60)
+        local = LRUTTLCache(maxsize=10, default_ttl=60)
+        cache = TieredCache(local, shared)
+        await shared.aset("key", POSTS, ttl=0, stale_ttl=60)
+
+        value, _, stale = await cache.aget_entry("key")
+        assert value == POSTS
+        assert stale
+        assert local.get_entry("key") == (None, 0, False)
+
+    asyncio.run(run())
+
+
+def test_tiered_cache_writes_both_tiers(collection):
+    async def run():
+        shared = MongoCache(collection, default_ttl=60)
+        local = LRUTTLCache(maxsize=10, default_ttl=60)
+        await TieredCache(local, shared).aset("key", POSTS)
+
+        assert local.get("key") == POSTS
+        assert await shared.aget("key") == POSTS
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize(
+    "backend, expected",
+    [("memory", LRUTTLCache), ("mongo", MongoCache), ("tiered", TieredCache)],
+)
+def test_build_cache_backends(monkeypatch, backend, expected):
+    monkeypatch.setenv("CACHE_BACKEND", backend)
+    assert type(build_cache(maxsize=10, default_ttl=60)) is expected
+
+
+def test_build_cache_rejects_unknown_backend(monkeypatch):
+    monkeypatch.setenv("CACHE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        build_cache(maxsize=10, default_ttl=60)
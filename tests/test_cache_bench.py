@@ -0,0 +1,41 @@
+"""
+Throughput of `LRUTTLCache` get/set on a full cache. Skipped unless
+`YARAPI_BENCH=1`; run with `YARAPI_BENCH=1 pytest -s tests/test_cache_bench.py`.
+"""
+
+import os
+import time
+
+import pytest
+
+from yarapi.core.cache import LRUTTLCache
+
+OPS = 200_000
+VALUE = [{"id": "1", "text": "a"}]
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("YARAPI_BENCH"), reason="set YARAPI_BENCH=1 to run"
+)
+
+
+def ops_per_second(op, keys) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        op(key)
+    return len(keys) / (time.perf_counter() - start)
+
+
+@pytest.mark.parametrize("entries", [1_000, 100_000, 1_000_000])
+def test_cache_throughput(entries):
+    cache = LRUTTLCache(maxsize=entries, default_ttl=3600)
+    for i in range(entries):
+        cache.set(i, VALUE)
+
+    hits = [i % entries for i in range(OPS)]
+    get = ops_per_second(cache.get, hits)
+    # new keys, each one evicting the least recently used entry
+    new = range(entries, entries + OPS)
+    put = ops_per_second(lambda key: cache.set(key, VALUE), new)
+
+    assert cache.stats()["entries"] == entries
+    print(f"\n{entries:>9} entries: get {get:,.0f}/s, set {put:,.0f}/s")
@@ -0,0 +1,53 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from yarapi.core.constants import LazyClassMap, resolve_datasources
+from yarapi.models.schemas import DataSource
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# imports the app in a fresh interpreter, with the Mongo clients mocked
+# by conftest, and prints the open_sea modules that got loaded
+IMPORT_APP = """
+import sys
+sys.path.insert(0, "tests")
+import conftest
+import main
+loaded = sorted(m for m in sys.modules if m.split(".")[0] == "open_sea")
+print("open_sea modules:", ",".join(loaded))
+"""
+
+
+def test_importing_the_app_does_not_load_open_sea():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_APP],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.splitlines()[-1] == "open_sea modules: "
+
+
+def test_lazy_class_map_imports_on_first_access():
+    classes = LazyClassMap(
+        {"ordered": "collections:OrderedDict", "missing": "no_such_module:Class"}
+    )
+    assert len(classes) == 2
+    assert list(classes) == ["ordered", "missing"]
+
+    from collections import OrderedDict
+
+    assert classes["ordered"] is OrderedDict
+    with pytest.raises(ModuleNotFoundError):
+        classes["missing"]
+
+
+def test_resolve_datasources():
+    assert resolve_datasources([]) == list(DataSource)
+    assert resolve_datasources(["all"]) == list(DataSource)
+    assert resolve_datasources(["twitter"]) == [DataSource.twitter]
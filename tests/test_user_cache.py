@@ -0,0 +1,152 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from yarapi.core.user_cache import UserCache
+
+
+def user_doc(username="alice", permissions="api_user"):
+    return {
+        "username": username,
+        "hashed_password": "hash",
+        "permissions": permissions,
+    }
+
+
+def make_cache(collection, **kwargs):
+    options = {"maxsize": 10, "ttl": 60, "poll_interval": 0.01}
+    options.update(kwargs)
+    return UserCache(collection, **options)
+
+
+class WithoutChangeStreams:
+    """Collection proxy behaving like a standalone mongod."""
+
+    def __init__(self, objects):
+        self._objects = objects
+
+    def __getattr__(self, name):
+        return getattr(self._objects, name)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure(
+            "The $changeStream stage is only supported on replica sets"
+        )
+
+
+class SlowFind:
+    """Collection proxy whose `find_one` waits until `release` is set."""
+
+    def __init__(self, objects):
+        self._objects = objects
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    def __getattr__(self, name):
+        return getattr(self._objects, name)
+
+    async def find_one(self, *args, **kwargs):
+        self.started.set()
+        await self.release.wait()
+        return await self._objects.find_one(*args, **kwargs)
+
+
+class Proxied:
+    def __init__(self, objects):
+        self.objects = objects
+
+
+def test_get_loads_and_caches_user(collection):
+    async def run():
+        collection.objects_sync.insert_one(user_doc())
+        cache = make_cache(collection)
+
+        user = await cache.get("alice")
+        assert user.username == "alice"
+        assert user.permissions == "api_user"
+        assert isinstance(user.id, str)
+
+        # served from memory from now on
+        collection.objects_sync.delete_many({})
+        assert await cache.get("alice") is user
+
+    asyncio.run(run())
+
+
+def test_get_unknown_user(collection):
+    async def run():
+        cache = make_cache(collection)
+        assert await cache.get("nobody") is None
+
+    asyncio.run(run())
+
+
+def test_invalidate_id_drops_user(collection):
+    async def run():
+        user_id = collection.objects_sync.insert_one(user_doc()).inserted_id
+        cache = make_cache(collection)
+        await cache.get("alice")
+
+        collection.objects_sync.update_one(
+            {"_id": user_id}, {"$set": {"permissions": "og_admin"}}
+        )
+        assert (await cache.get("alice")).permissions == "api_user"
+
+        cache.invalidate_id(str(user_id))
+        assert (await cache.get("alice")).permissions == "og_admin"
+
+    asyncio.run(run())
+
+
+def test_invalidate_unknown_id_is_ignored(collection):
+    async def run():
+        collection.objects_sync.insert_one(user_doc())
+        cache = make_cache(collection)
+        user = await cache.get("alice")
+
+        cache.invalidate_id("000000000000000000000000")
+        assert await cache.get("alice") is user
+
+    asyncio.run(run())
+
+
+def test_load_racing_an_invalidation_is_not_cached(collection):
+    async def run():
+        collection.objects_sync.insert_one(user_doc())
+        slow = SlowFind(collection.objects)
+        cache = make_cache(Proxied(slow))
+
+        load = asyncio.create_task(cache.get("alice"))
+        await slow.started.wait()
+        # the user changes while it is being loaded
+        cache.invalidate("alice")
+        slow.release.set()
+        assert (await load).username == "alice"
+
+        # the possibly outdated copy was returned but not cached
+        assert cache._users.get("alice") is None
+
+    asyncio.run(run())
+
+
+def test_polls_when_change_streams_are_unavailable(collection):
+    async def run():
+        user_id = collection.objects_sync.insert_one(user_doc()).inserted_id
+        cache = make_cache(Proxied(WithoutChangeStreams(collection.objects)))
+        cache.start()
+        try:
+            await asyncio.sleep(0.05)
+            assert (await cache.get("alice")).permissions == "api_user"
+
+            collection.objects_sync.update_one(
+                {"_id": user_id}, {"$set": {"permissions": "og_admin"}}
+            )
+            for _ in range(100):
+                if cache._users.get("alice") is None:
+                    break
+                await asyncio.sleep(0.01)
+            assert (await cache.get("alice")).permissions == "og_admin"
+        finally:
+            await cache.stop()
+
+    asyncio.run(run())
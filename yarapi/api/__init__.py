@@ -1,5 +1,10 @@
-from fastapi import APIRouter
-from fastapi.responses import RedirectResponse
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import PlainTextResponse, RedirectResponse
+
+from yarapi.config import config
+from yarapi.core.metrics import registry
 
 router = APIRouter()
 
@@ -10,3 +15,22 @@ router = APIRouter()
 )
 async def index_endpoint():
     return RedirectResponse(url="/docs", status_code=302)
+
+
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+)
+async def metrics_endpoint(request: Request):
+    """
+    Prometheus metrics. When `METRICS_TOKEN` is set, scrapes must send it
+    as a bearer token.
+    """
+    token = config.metrics_token
+    if token is not None:
+        auth = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
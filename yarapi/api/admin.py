@@ -0,0 +1,67 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+
+from yarapi.config import config
+from yarapi.core.profiler import (
+    ProfilerBusy,
+    finish_profile,
+    slow_request_profiler,
+    start_profile,
+)
+from yarapi.core.security import require_web_admin
+
+router = APIRouter(dependencies=[Depends(require_web_admin)])
+
+
+@router.get(
+    "/profile",
+    response_class=PlainTextResponse,
+    summary="Samples the live process and returns collapsed stacks.",
+)
+async def profile_endpoint(
+    seconds: float = Query(10, gt=0, le=120),
+    interval_ms: int = Query(config.profile_interval_ms, ge=1, le=1000),
+):
+    """
+    Profiles every thread (event loop and workers) for `seconds`. The
+    output is one `stack count` line per distinct stack, which can be fed
+    to flamegraph.pl or opened in speedscope.
+    """
+    try:
+        sampler = start_profile(interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        collapsed = finish_profile(sampler)
+    return PlainTextResponse(collapsed)
+
+
+@router.get(
+    "/profile/slow",
+    summary="Lists the profiles captured for slow requests.",
+)
+async def slow_profiles_endpoint():
+    return {
+        "enabled": slow_request_profiler.enabled,
+        "threshold_ms": config.profile_slow_request_ms,
+        "profiles": slow_request_profiler.list(),
+    }
+
+
+@router.get(
+    "/profile/slow/{profile_id}",
+    response_class=PlainTextResponse,
+    summary="Returns the collapsed stacks of a slow-request profile.",
+)
+async def slow_profile_endpoint(profile_id: int):
+    profile = slow_request_profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+        )
+    return PlainTextResponse(profile["collapsed"])
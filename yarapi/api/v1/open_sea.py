@@ -1,4 +1,9 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Response
+import asyncio
+from functools import partial
+from typing import AsyncIterator, Callable, List
+
+from fastapi import APIRouter, HTTPException, Query, Request, status, Depends, Response
+from fastapi.responses import StreamingResponse
 
 from yarapi.models.schemas import (
     SearchRequest,
@@ -7,18 +12,451 @@ from yarapi.models.schemas import (
     ProfileInput,
     CommentsInput,
     TimeseriesInput,
+    ProfilesBatchInput,
+    CommentsBatchInput,
+    BatchResponse,
+    JobStatus,
+    JobResultsResponse,
 )
+from yarapi.models.users import UserInDB
 from yarapi.core.search_service import (
+    iter_search,
+    normalize_query,
     run_search,
     run_profile_search,
     run_comments_search,
     run_timeseries_search,
 )
+from yarapi.config import config
+from yarapi.core.jobs import JobQueueFull, search_jobs
+from yarapi.core.pagination import Page, make_cursor, read_cursor
+from yarapi.core.projection import Projection
+from yarapi.core.ratelimit import Quota
 from yarapi.core.security import require_api_user
-from yarapi.core.cache import cache
+from yarapi.utils.serialization import dumps
+from yarapi.core.cache import (
+    CacheBackend,
+    CachedPayload,
+    pack_payload,
+    result_checksum,
+    search_cache,
+    profile_cache,
+    comments_cache,
+    timeseries_cache,
+    inflight,
+    refresher,
+    shard_cache,
+)
+from yarapi.core.tracing import tracer
 
 router = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def fetch_and_cache(cache: CacheBackend, cache_key: str, fetch):
+    """
+    Runs `fetch()` and caches its result, sharing a single upstream call
+    among concurrent misses for the same key. Returns the result as it was
+    cached, so a first page and the cursors after it see the same value.
+    """
+
+    async def call():
+        results = pack_payload(await fetch())
+        await cache.aset(cache_key, results)
+        return results
+
+    with tracer.span("fetch", shared=inflight.in_flight(cache_key)):
+        return await inflight.do(cache_key, call)
+
+
+async def lookup_cache(cache: CacheBackend, cache_key: str, fetch):
+    """
+    Returns (cached, ttl_left, stale). Stale hits schedule a background
+    refresh through `fetch` and are still served.
+    """
+    with tracer.span("cache.lookup"):
+        cached, ttl_left, stale = await cache.aget_entry(cache_key)
+    if cached is not None and stale:
+        refresher.schedule(cache_key, partial(fetch_and_cache, cache, cache_key, fetch))
+    return cached, ttl_left, stale
+
+
+def search_response(
+    data,
+    response: Response,
+    results_count: int | None = None,
+    page: Page | None = None,
+    cache_key: str | None = None,
+    projection: Projection | None = None,
+):
+    """
+    Serializes already-trusted results straight to a JSON response with the
+    `SearchResponse` shape, skipping pydantic validation. Headers set on
+    `response` are carried over. With a `page` limit only the first page
+    is returned, with a cursor into the result cached under `cache_key`.
+    A `projection` keeps only the requested fields of each item.
+    """
+    if page is not None and page.limit is not None:
+        return paged_response(
+            data, response, cache_key, page.limit, projection=projection
+        )
+
+    with tracer.span("serialize"):
+        if projection is not None:
+            data = projection.apply(data)
+        if isinstance(data, CachedPayload):
+            data_bytes = data.json_bytes()
+            if results_count is None:
+                results_count = data.count
+        else:
+            data_bytes = dumps(data)
+            if results_count is None:
+                results_count = len(data)
+
+        body = b'{"status":"success","results_count":%d,"data":%s}' % (
+            results_count,
+            data_bytes,
+        )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
+
+def set_hit_headers(response: Response, ttl_left: int, stale: bool = False) -> None:
+    if stale:
+        response.headers["X-Cache"] = "STALE"
+        response.headers["X-Cache-TTL-Remaining"] = "0"
+        response.headers["Cache-Control"] = (
+            f"public, max-age=0, stale-while-revalidate={ttl_left}"
+        )
+        return
+    response.headers["X-Cache"] = "HIT"
+    response.headers["X-Cache-TTL-Remaining"] = str(ttl_left)
+    response.headers["Cache-Control"] = f"public, max-age={ttl_left}"
+
+
+def cache_hit_response(
+    cached,
+    ttl_left: int,
+    response: Response,
+    results_count: int | None = None,
+    stale: bool = False,
+    page: Page | None = None,
+    cache_key: str | None = None,
+    projection: Projection | None = None,
+):
+    set_hit_headers(response, ttl_left, stale)
+    return search_response(cached, response, results_count, page, cache_key, projection)
+
+
+def paged_response(
+    data,
+    response: Response,
+    cache_key: str,
+    limit: int,
+    offset: int = 0,
+    projection: Projection | None = None,
+):
+    """
+    Serializes `limit` items of a result from `offset`, with a signed
+    cursor to the next page if there is one. Only the page is projected.
+    """
+    with tracer.span("serialize"):
+        items = data.load() if isinstance(data, CachedPayload) else data
+        page = items[offset : offset + limit]
+        next_offset = offset + len(page)
+        next_cursor = None
+        if next_offset < len(items):
+            next_cursor = make_cursor(
+                cache_key, next_offset, limit, len(items), result_checksum(data)
+            )
+        body = dumps(
+            {
+                "status": "success",
+                "results_count": len(page),
+                "data": projection.apply(page) if projection is not None else page,
+                "next_cursor": next_cursor,
+            }
+        )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
+
+async def cursor_response(
+    cache: CacheBackend,
+    cache_key: str,
+    page: Page,
+    response: Response,
+    projection: Projection | None = None,
+):
+    """
+    Serves the page a cursor points to from the cached result, never going
+    upstream. Answers 410 once the result is no longer cached (or was
+    replaced by a refresh), so the client restarts from the first page.
+    """
+    position = read_cursor(page.cursor, cache_key)
+    cached, ttl_left, stale = await cache.aget_entry(cache_key)
+    if cached is not None:
+        total = cached.count if isinstance(cached, CachedPayload) else len(cached)
+    if (
+        cached is None
+        or total != position["total"]
+        or result_checksum(cached) != position["checksum"]
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="The result is no longer cached, request it again without a cursor",
+        )
+    set_hit_headers(response, ttl_left, stale)
+    return paged_response(
+        cached,
+        response,
+        cache_key,
+        page.limit or position["limit"],
+        position["offset"],
+        projection,
+    )
+
+
+def canonical_search(datasource: DataSource, request: SearchRequest) -> dict:
+    """
+    The parts of a search request that change what gets crawled, in a
+    canonical form: queries normalized, de-duplicated and sorted, and
+    fields the data source ignores dropped.
+    """
+    data = request.dict()
+    data["queries"] = sorted({normalize_query(q) for q in request.queries})
+    if request.relative_interval:
+        # relative_interval overrides since/until
+        data.pop("since")
+        data.pop("until")
+        data["relative_interval"] = request.relative_interval.lower()
+    if datasource == DataSource.twitter:
+        # X is not split by date windows and ignores country/lang
+        for field in ("step_days", "country", "lang"):
+            data.pop(field)
+    else:
+        data.pop("sort")
+        data["country"] = request.country.lower()
+        data["lang"] = request.lang.lower()
+    return data
+
+
+def canonical_identifier(identifier: str) -> str:
+    return identifier.strip().rstrip("/")
+
+
+def canonical_timeseries(request: TimeseriesInput) -> dict:
+    data = request.dict()
+    data["query"] = normalize_query(request.query)
+    return data
+
+
+def wants_stream(http_request: Request, stream: bool) -> bool:
+    return stream or NDJSON_MEDIA_TYPE in http_request.headers.get("accept", "")
+
+
+async def stream_and_cache(
+    cache: CacheBackend, cache_key: str, batches: AsyncIterator[list]
+) -> AsyncIterator[list]:
+    """
+    Passes batches through and caches the full result once the stream
+    completes. Aborted streams are not cached.
+    """
+    results = []
+    async for batch in batches:
+        results.extend(batch)
+        yield batch
+    await cache.aset(cache_key, pack_payload(results))
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    `StreamingResponse` that calls `on_close()` once it has been sent or
+    aborted, even if the client went away before the body was started.
+    """
+
+    def __init__(self, content, on_close: Callable[[], None], **kwargs):
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.on_close()
+
+
+async def single_batch(data) -> AsyncIterator[list]:
+    if isinstance(data, CachedPayload):
+        data = data.load()
+    yield data
+
+
+def ndjson_response(
+    batches: AsyncIterator[list],
+    response: Response,
+    projection: Projection | None = None,
+    on_close: Callable[[], None] | None = None,
+):
+    """
+    Streams results as newline-delimited JSON, one item per line. Errors
+    after the stream started are reported as a final `{"status": "error"}`
+    line, since the status code has already been sent. `on_close` is
+    called once the response is done, however it ended.
+    """
+
+    async def lines():
+        try:
+            async for batch in batches:
+                if projection is not None:
+                    batch = projection.apply(batch)
+                yield b"".join(dumps(item) + b"\n" for item in batch)
+        except Exception as e:
+            print(f"Unexpected server error: {e}")
+            yield dumps({"status": "error", "detail": str(e)}) + b"\n"
+
+    if on_close is not None:
+        return ClosingStreamingResponse(
+            lines(),
+            on_close,
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=dict(response.headers),
+        )
+    return StreamingResponse(
+        lines(), media_type=NDJSON_MEDIA_TYPE, headers=dict(response.headers)
+    )
+
+
+def unique_identifiers(identifiers: List[str]) -> List[str]:
+    """Drops identifiers that repeat an earlier one once canonicalized."""
+    seen = set()
+    unique = []
+    for identifier in identifiers:
+        canonical = canonical_identifier(identifier)
+        if canonical not in seen:
+            seen.add(canonical)
+            unique.append(identifier)
+    return unique
+
+
+def encode_batch_item(
+    identifier: str, cache_status: str, data, projection: Projection | None = None
+) -> bytes:
+    if projection is not None:
+        data = projection.apply(data)
+    data_bytes = data.json_bytes() if isinstance(data, CachedPayload) else dumps(data)
+    head = dumps({"identifier": identifier, "status": "success", "cache": cache_status})
+    return head[:-1] + b',"data":' + data_bytes + b"}"
+
+
+async def batch_item(
+    cache: CacheBackend,
+    identifier: str,
+    cache_key: str,
+    fetch: Callable,
+    semaphore: asyncio.Semaphore,
+    quota: Quota,
+    projection: Projection | None = None,
+) -> tuple[bool, bytes]:
+    """
+    Serves one identifier of a batch from `cache`, fetching it under
+    `semaphore` on a miss. Returns (ok, encoded item); a failed or rate
+    limited item is reported as an error item instead of failing the
+    whole batch.
+    """
+    try:
+        cached, ttl_left, stale = await lookup_cache(cache, cache_key, fetch)
+        if cached is not None:
+            quota.hit()
+            cache_status = "STALE" if stale else "HIT"
+            return True, encode_batch_item(identifier, cache_status, cached, projection)
+
+        quota.take()
+        async with semaphore:
+            result = await fetch_and_cache(cache, cache_key, fetch)
+    except HTTPException as e:
+        return False, dumps(
+            {"identifier": identifier, "status": "error", "detail": e.detail}
+        )
+    except Exception as e:
+        print(f"Batch item {identifier} failed: {e}")
+        return False, dumps(
+            {"identifier": identifier, "status": "error", "detail": str(e)}
+        )
+    return True, encode_batch_item(identifier, "MISS", result, projection)
+
+
+async def batch_response(
+    cache: CacheBackend,
+    items: List[tuple[str, str, Callable]],
+    response: Response,
+    stream: bool,
+    quota: Quota,
+    projection: Projection | None = None,
+):
+    """
+    Runs (identifier, cache_key, fetch) items concurrently, at most
+    `config.batch_concurrency` upstream fetches at a time.
+    - The batch holds one in-flight slot of `quota` and each fetch takes
+      a token; items beyond the rate limit are reported as errors.
+    - Returns a `BatchResponse` with the items in request order, or
+    - streams them as NDJSON, one item per line, as they complete.
+    """
+    quota.acquire()
+    semaphore = asyncio.Semaphore(config.batch_concurrency)
+    tasks = [
+        asyncio.ensure_future(batch_item(cache, *item, semaphore, quota, projection))
+        for item in items
+    ]
+
+    if stream:
+
+        async def lines():
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    _, item = await next_done
+                    yield item + b"\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+        def close():
+            # the body may never have been started if the client went away
+            for task in tasks:
+                task.cancel()
+            quota.release()
+
+        return ClosingStreamingResponse(
+            lines(),
+            close,
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=dict(response.headers),
+        )
+
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        quota.release()
+    errors_count = sum(1 for ok, _ in results if not ok)
+    body = b'{"status":"success","results_count":%d,"errors_count":%d,"data":[%s]}' % (
+        len(results),
+        errors_count,
+        b",".join(item for _, item in results),
+    )
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=dict(response.headers),
+    )
+
 
 @router.post(
     "/{datasource}/search",
@@ -30,34 +468,82 @@ async def search_endpoint(
     datasource: DataSource,
     request: SearchRequest,
     response: Response,
+    http_request: Request,
+    stream: bool = Query(
+        False,
+        description=f"Stream posts as {NDJSON_MEDIA_TYPE} as each date window completes.",
+    ),
+    page: Page = Depends(),
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
 ):
     """
     Main endpoint to perform searches on different data sources.
 
     - **datasource**: The platform where the search will be performed (instagram, facebook, etc.).
     - **request body**: Contains the search parameters, such as queries, time range, and filters.
+    - **stream**: Stream results as NDJSON (also enabled by `Accept: application/x-ndjson`).
+    - **limit** / **cursor**: Return the results a page at a time; later pages are served from the cache.
+    - **fields**: Return only these (dotted, for nested) fields of each post.
+
+    Crawls count against the user's rate limits and in-flight quota for the
+    data source; exceeding them returns `429` with a `Retry-After` header.
     """
     try:
-        cache_key = f"{datasource.value}:search:{cache.serialize_key(request.dict())}"
+        cache_key = search_cache.make_key(
+            f"{datasource.value}:search", canonical_search(datasource, request)
+        )
+        streaming = wants_stream(http_request, stream)
+        if streaming and page.requested:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Pagination is not available when streaming",
+            )
+        if page.cursor is not None:
+            quota.hit()
+            return await cursor_response(
+                search_cache, cache_key, page, response, projection
+            )
 
-        cached, ttl_left = cache.get_with_ttl(cache_key)
+        fetch = partial(run_search, datasource, request)
+        cached, ttl_left, stale = await lookup_cache(search_cache, cache_key, fetch)
 
         if cached is not None:
-            response.headers["X-Cache"] = "HIT"
-            response.headers["X-Cache-TTL-Remaining"] = str(ttl_left)
-            response.headers["Cache-Control"] = f"public, max-age={ttl_left}"
-
-            return SearchResponse(
-                results_count=len(cached),
-                data=cached,
+            quota.hit()
+            if streaming:
+                set_hit_headers(response, ttl_left, stale)
+                return ndjson_response(single_batch(cached), response, projection)
+            return cache_hit_response(
+                cached,
+                ttl_left,
+                response,
+                stale=stale,
+                page=page,
+                cache_key=cache_key,
+                projection=projection,
             )
 
-        results = await run_search(datasource, request)
+        if streaming:
+            quota.begin()
+            response.headers["X-Cache"] = "MISS"
+            return ndjson_response(
+                stream_and_cache(
+                    search_cache, cache_key, iter_search(datasource, request)
+                ),
+                response,
+                projection,
+                on_close=quota.release,
+            )
 
-        cache.set(cache_key, results)
+        async with quota.crawl():
+            results = await fetch_and_cache(search_cache, cache_key, fetch)
 
         response.headers["X-Cache"] = "MISS"
-        return SearchResponse(results_count=len(results), data=results)
+        return search_response(
+            results, response, page=page, cache_key=cache_key, projection=projection
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unexpected server error: {e}")
         raise HTTPException(
@@ -75,31 +561,95 @@ async def profile_endpoint(
     datasource: DataSource,
     request: ProfileInput,
     response: Response,
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
 ):
     """
     Retrieves a profile from a specific data source.
 
     - **datasource**: The platform to search on.
     - **identifier**: The username or URL of the profile.
+    - **fields**: Return only these (dotted, for nested) fields of the profile.
     """
     try:
-        cache_key = f"{datasource.value}:profile:{request.identifier}"
-        cached, ttl_left = cache.get_with_ttl(cache_key)
+        cache_key = profile_cache.make_key(
+            f"{datasource.value}:profile", canonical_identifier(request.identifier)
+        )
+        fetch = partial(run_profile_search, datasource, request)
+        cached, ttl_left, stale = await lookup_cache(profile_cache, cache_key, fetch)
 
         if cached is not None:
-            response.headers["X-Cache"] = "HIT"
-            response.headers["X-Cache-TTL-Remaining"] = str(ttl_left)
-            response.headers["Cache-Control"] = f"public, max-age={ttl_left}"
-            return SearchResponse(
+            quota.hit()
+            return cache_hit_response(
+                cached,
+                ttl_left,
+                response,
                 results_count=1,
-                data=cached,
+                stale=stale,
+                projection=projection,
             )
 
-        result = await run_profile_search(datasource, request)
-        cache.set(cache_key, result)
+        async with quota.crawl():
+            result = await fetch_and_cache(profile_cache, cache_key, fetch)
 
         response.headers["X-Cache"] = "MISS"
-        return SearchResponse(results_count=1, data=result)
+        return search_response(result, response, results_count=1, projection=projection)
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Unexpected server error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.post(
+    "/{datasource}/profiles:batch",
+    response_model=BatchResponse,
+    dependencies=[Depends(require_api_user)],
+    summary="Retrieves many profiles in one request.",
+)
+async def profiles_batch_endpoint(
+    datasource: DataSource,
+    request: ProfilesBatchInput,
+    response: Response,
+    http_request: Request,
+    stream: bool = Query(
+        False, description=f"Stream items as {NDJSON_MEDIA_TYPE} as they complete."
+    ),
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
+):
+    """
+    Retrieves profiles for a list of identifiers from a specific data source.
+
+    - **datasource**: The platform to search on.
+    - **identifiers**: The usernames or URLs of the profiles.
+
+    Cached profiles are served from the cache; the others are fetched
+    concurrently. Each item reports its own success or error.
+    """
+    try:
+        items = []
+        for identifier in unique_identifiers(request.identifiers):
+            cache_key = profile_cache.make_key(
+                f"{datasource.value}:profile", canonical_identifier(identifier)
+            )
+            fetch = partial(
+                run_profile_search, datasource, ProfileInput(identifier=identifier)
+            )
+            items.append((identifier, cache_key, fetch))
+
+        return await batch_response(
+            profile_cache,
+            items,
+            response,
+            wants_stream(http_request, stream),
+            quota,
+            projection,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unexpected server error: {e}")
         raise HTTPException(
@@ -116,6 +666,9 @@ async def comments_endpoint(
     datasource: DataSource,
     request: CommentsInput,
     response: Response,
+    page: Page = Depends(),
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
 ):
     """
     Retrieves comments from a post on a specific data source.
@@ -123,24 +676,101 @@ async def comments_endpoint(
     - **datasource**: The platform to search on.
     - **identifier**: The post ID or URL.
     - **amount**: The number of comments to retrieve.
+    - **limit** / **cursor**: Return the comments a page at a time.
+    - **fields**: Return only these (dotted, for nested) fields of each comment.
     """
     try:
-        cache_key = f"{datasource.value}:comments:{request.identifier}:{request.amount}"
-        cached, ttl_left = cache.get_with_ttl(cache_key)
+        cache_key = comments_cache.make_key(
+            f"{datasource.value}:comments",
+            [canonical_identifier(request.identifier), request.amount],
+        )
+        if page.cursor is not None:
+            quota.hit()
+            return await cursor_response(
+                comments_cache, cache_key, page, response, projection
+            )
+
+        fetch = partial(run_comments_search, datasource, request)
+        cached, ttl_left, stale = await lookup_cache(comments_cache, cache_key, fetch)
 
         if cached is not None:
-            response.headers["X-Cache"] = "HIT"
-            response.headers["X-Cache-TTL-Remaining"] = str(ttl_left)
-            response.headers["Cache-Control"] = f"public, max-age={ttl_left}"
-            return SearchResponse(
-                results_count=len(cached),
-                data=cached,
+            quota.hit()
+            return cache_hit_response(
+                cached,
+                ttl_left,
+                response,
+                stale=stale,
+                page=page,
+                cache_key=cache_key,
+                projection=projection,
             )
 
-        results = await run_comments_search(datasource, request)
-        cache.set(cache_key, results)
+        async with quota.crawl():
+            results = await fetch_and_cache(comments_cache, cache_key, fetch)
         response.headers["X-Cache"] = "MISS"
-        return SearchResponse(results_count=len(results), data=results)
+        return search_response(
+            results, response, page=page, cache_key=cache_key, projection=projection
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Unexpected server error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+@router.post(
+    "/{datasource}/comments:batch",
+    response_model=BatchResponse,
+    dependencies=[Depends(require_api_user)],
+    summary="Retrieves the comments of many posts in one request.",
+)
+async def comments_batch_endpoint(
+    datasource: DataSource,
+    request: CommentsBatchInput,
+    response: Response,
+    http_request: Request,
+    stream: bool = Query(
+        False, description=f"Stream items as {NDJSON_MEDIA_TYPE} as they complete."
+    ),
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
+):
+    """
+    Retrieves comments for a list of posts on a specific data source.
+
+    - **datasource**: The platform to search on.
+    - **identifiers**: The post IDs or URLs.
+    - **amount**: The number of comments to retrieve per post.
+
+    Cached posts are served from the cache; the others are fetched
+    concurrently. Each item reports its own success or error.
+    """
+    try:
+        items = []
+        for identifier in unique_identifiers(request.identifiers):
+            cache_key = comments_cache.make_key(
+                f"{datasource.value}:comments",
+                [canonical_identifier(identifier), request.amount],
+            )
+            fetch = partial(
+                run_comments_search,
+                datasource,
+                CommentsInput(identifier=identifier, amount=request.amount),
+            )
+            items.append((identifier, cache_key, fetch))
+
+        return await batch_response(
+            comments_cache,
+            items,
+            response,
+            wants_stream(http_request, stream),
+            quota,
+            projection,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unexpected server error: {e}")
         raise HTTPException(
@@ -157,37 +787,179 @@ async def timeseries_endpoint(
     datasource: DataSource,
     request: TimeseriesInput,
     response: Response,
+    page: Page = Depends(),
+    projection: Projection = Depends(),
+    quota: Quota = Depends(),
 ):
     """
     Retrieves timeseries data for a profile on a specific data source.
+    Supports `limit` / `cursor` pagination and `fields` projection.
     """
     try:
-        cache_key = (
-            f"{datasource.value}:timeseries:{cache.serialize_key(request.dict())}"
+        cache_key = timeseries_cache.make_key(
+            f"{datasource.value}:timeseries", canonical_timeseries(request)
         )
-        cached, ttl_left = cache.get_with_ttl(cache_key)
+        if page.cursor is not None:
+            quota.hit()
+            return await cursor_response(
+                timeseries_cache, cache_key, page, response, projection
+            )
 
-        if cached is not None:
-            response.headers["X-Cache"] = "HIT"
-            response.headers["X-Cache-TTL-Remaining"] = str(ttl_left)
-            response.headers["Cache-Control"] = f"public, max-age={ttl_left}"
+        fetch = partial(run_timeseries_search, datasource, request)
+        cached, ttl_left, stale = await lookup_cache(timeseries_cache, cache_key, fetch)
 
-            return SearchResponse(
-                results_count=len(cached),
-                data=cached,
+        if cached is not None:
+            quota.hit()
+            return cache_hit_response(
+                cached,
+                ttl_left,
+                response,
+                stale=stale,
+                page=page,
+                cache_key=cache_key,
+                projection=projection,
             )
 
-        results = await run_timeseries_search(datasource, request)
-        cache.set(cache_key, results)
+        async with quota.crawl():
+            results = await fetch_and_cache(timeseries_cache, cache_key, fetch)
 
         response.headers["X-Cache"] = "MISS"
-        return SearchResponse(results_count=len(results), data=results)
+        return search_response(
+            results, response, page=page, cache_key=cache_key, projection=projection
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Unexpected server error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+def job_status(job: dict) -> JobStatus:
+    fields = {k: v for k, v in job.items() if k in JobStatus.model_fields}
+    return JobStatus(job_id=job["_id"], **fields)
+
+
+@router.post(
+    "/{datasource}/search:async",
+    response_model=JobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Starts a search in the background and returns its job.",
+)
+async def search_async_endpoint(
+    datasource: DataSource,
+    request: SearchRequest,
+    response: Response,
+    user: UserInDB = Depends(require_api_user),
+    quota: Quota = Depends(),
+):
+    """
+    Queues a search and returns right away with its job id. Poll
+    `/v1/jobs/{job_id}` for its status and page through its results with
+    `/v1/jobs/{job_id}/results`, also while it is still running.
+    """
+    try:
+        quota.take()
+        job = await search_jobs.submit(datasource, request, owner=user.username)
+        response.headers["Location"] = f"/v1/jobs/{job['_id']}"
+        return job_status(job)
+    except HTTPException:
+        raise
+    except JobQueueFull as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e)
+        )
+    except Exception as e:
+        print(f"Unexpected server error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+        )
+
+
+async def get_job(job_id: str, user: UserInDB) -> dict:
+    job = await search_jobs.get(job_id, owner=user.username)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def job_status_endpoint(job_id: str, user: UserInDB = Depends(require_api_user)):
+    """
+    Status of a search job started by the current user.
+    """
+    return job_status(await get_job(job_id, user))
+
+
+@router.get("/jobs/{job_id}/results", response_model=JobResultsResponse)
+async def job_results_endpoint(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int | None = Query(
+        None, gt=0, le=10000, description="Page size, 1000 or the cursor's by default."
+    ),
+    cursor: str | None = Query(None, description="`next_cursor` of the previous page."),
+    projection: Projection = Depends(),
+    user: UserInDB = Depends(require_api_user),
+):
+    """
+    A page of the posts of a search job, by `offset` or by `cursor`.
+    Running jobs return the posts stored so far; `next_offset` and
+    `next_cursor` are null once a finished job has no more.
+    """
+    job = await get_job(job_id, user)
+    cursor_key = f"job:{job_id}"
+    if cursor is not None:
+        position = read_cursor(cursor, cursor_key)
+        offset = position["offset"]
+        limit = limit or position["limit"]
+    limit = limit or 1000
+    try:
+        posts = await search_jobs.results(job_id, offset, limit)
     except Exception as e:
         print(f"Unexpected server error: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
         )
 
+    next_offset = offset + len(posts)
+    finished = job["status"] in ("succeeded", "failed")
+    if finished and next_offset >= job["results_count"]:
+        next_offset = None
+
+    body = {
+        "status": "success",
+        "results_count": len(posts),
+        "data": projection.apply(posts),
+        "job_status": job["status"],
+        "offset": offset,
+        "next_offset": next_offset,
+        "next_cursor": (
+            make_cursor(cursor_key, next_offset, limit)
+            if next_offset is not None
+            else None
+        ),
+    }
+    return Response(content=dumps(body), media_type="application/json")
+
+
+@router.get("/cache/stats", dependencies=[Depends(require_api_user)])
+async def cache_stats():
+    """
+    Hit rates, sizes and eviction counters of the result caches.
+    """
+    return {
+        "search": search_cache.stats(),
+        "profile": profile_cache.stats(),
+        "comments": comments_cache.stats(),
+        "timeseries": timeseries_cache.stats(),
+        "shard": shard_cache.stats(),
+        "refresh": refresher.stats(),
+    }
+
 
 @router.get("/health", status_code=status.HTTP_200_OK)
 async def health_check():
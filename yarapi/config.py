@@ -33,6 +33,65 @@ class ConfigProtocol(Protocol):
     short_backoff_log: bool
 
     cache_ttl_seconds: int
+    cache_backend: str
+    cache_maxsize: int
+    cache_sweep_seconds: int
+    cache_search_max_mb: int
+    cache_profile_max_mb: int
+    cache_comments_max_mb: int
+    cache_timeseries_max_mb: int
+    cache_shard_max_mb: int
+    shard_cache_closed_ttl_seconds: int
+    cache_stale_ttl_seconds: int
+    cache_refresh_concurrency: int
+    cache_storage: str
+    cache_compression_level: int
+
+    auth_cache_ttl_seconds: int
+    auth_cache_maxsize: int
+
+    user_cache_ttl_seconds: int
+    user_cache_maxsize: int
+    user_cache_poll_seconds: int
+
+    tracing_exporter: str
+    server_timing: bool
+    metrics_token: str | None
+
+    profile_interval_ms: int
+    profile_slow_request_ms: int
+    profile_slow_window_seconds: int
+    profile_slow_keep: int
+
+    host: str
+    port: int
+    web_concurrency: int
+    uvicorn_loop: str
+    uvicorn_http: str
+    uvicorn_backlog: int
+    uvicorn_keep_alive_seconds: int
+    graceful_shutdown_seconds: int
+    preload_datasources: list[str]
+    processor_pool_size: int
+    batch_concurrency: int
+
+    job_workers: int
+    job_queue_size: int
+    job_retention_seconds: int
+    job_chunk_size: int
+
+    post_store_enabled: bool
+    post_store_batch_size: int
+    post_store_window_ttl_seconds: int
+    post_store_post_ttl_seconds: int
+
+    cursor_max_age_seconds: int
+
+    rate_limit_enabled: bool
+    rate_limit_per_minute: float
+    rate_limit_burst: int
+    rate_limit_max_in_flight: int
+    rate_limit_exempt_cache_hits: bool
 
 
 class Config(ConfigProtocol):
@@ -114,5 +173,212 @@ class Config(ConfigProtocol):
     def cache_ttl_seconds(self) -> int:
         return int(getenv("CACHE_TTL_SECONDS", 60))
 
+    @property
+    def cache_backend(self) -> str:
+        return getenv("CACHE_BACKEND", "memory").lower()
+
+    @property
+    def cache_maxsize(self) -> int:
+        return int(getenv("CACHE_MAXSIZE", 1000))
+
+    @property
+    def cache_sweep_seconds(self) -> int:
+        return int(getenv("CACHE_SWEEP_SECONDS", 0))
+
+    @property
+    def cache_search_max_mb(self) -> int:
+        return int(getenv("CACHE_SEARCH_MAX_MB", 1024))
+
+    @property
+    def cache_profile_max_mb(self) -> int:
+        return int(getenv("CACHE_PROFILE_MAX_MB", 64))
+
+    @property
+    def cache_comments_max_mb(self) -> int:
+        return int(getenv("CACHE_COMMENTS_MAX_MB", 256))
+
+    @property
+    def cache_timeseries_max_mb(self) -> int:
+        return int(getenv("CACHE_TIMESERIES_MAX_MB", 64))
+
+    @property
+    def cache_shard_max_mb(self) -> int:
+        return int(getenv("CACHE_SHARD_MAX_MB", 512))
+
+    @property
+    def shard_cache_closed_ttl_seconds(self) -> int:
+        return int(getenv("SHARD_CACHE_CLOSED_TTL_SECONDS", 86400))
+
+    @property
+    def cache_stale_ttl_seconds(self) -> int:
+        return int(getenv("CACHE_STALE_TTL_SECONDS", 0))
+
+    @property
+    def cache_refresh_concurrency(self) -> int:
+        return int(getenv("CACHE_REFRESH_CONCURRENCY", 4))
+
+    @property
+    def cache_storage(self) -> str:
+        return getenv("CACHE_STORAGE", "objects").lower()
+
+    @property
+    def cache_compression_level(self) -> int:
+        return int(getenv("CACHE_COMPRESSION_LEVEL", 1))
+
+    @property
+    def auth_cache_ttl_seconds(self) -> int:
+        return int(getenv("AUTH_CACHE_TTL_SECONDS", 300))
+
+    @property
+    def auth_cache_maxsize(self) -> int:
+        return int(getenv("AUTH_CACHE_MAXSIZE", 10000))
+
+    @property
+    def user_cache_ttl_seconds(self) -> int:
+        return int(getenv("USER_CACHE_TTL_SECONDS", 60))
+
+    @property
+    def user_cache_maxsize(self) -> int:
+        return int(getenv("USER_CACHE_MAXSIZE", 10000))
+
+    @property
+    def user_cache_poll_seconds(self) -> int:
+        return int(getenv("USER_CACHE_POLL_SECONDS", 5))
+
+    @property
+    def tracing_exporter(self) -> str:
+        return getenv("TRACING_EXPORTER", "none").lower()
+
+    @property
+    def server_timing(self) -> bool:
+        return bool(int(getenv("SERVER_TIMING", 1)))
+
+    @property
+    def metrics_token(self) -> str | None:
+        return getenv("METRICS_TOKEN") or None
+
+    @property
+    def profile_interval_ms(self) -> int:
+        return int(getenv("PROFILE_INTERVAL_MS", 10))
+
+    @property
+    def profile_slow_request_ms(self) -> int:
+        return int(getenv("PROFILE_SLOW_REQUEST_MS", 0))
+
+    @property
+    def profile_slow_window_seconds(self) -> int:
+        return int(getenv("PROFILE_SLOW_WINDOW_SECONDS", 120))
+
+    @property
+    def profile_slow_keep(self) -> int:
+        return int(getenv("PROFILE_SLOW_KEEP", 20))
+
+    @property
+    def host(self) -> str:
+        return getenv("HOST", "0.0.0.0")
+
+    @property
+    def port(self) -> int:
+        return int(getenv("PORT", 3000))
+
+    @property
+    def web_concurrency(self) -> int:
+        return int(getenv("WEB_CONCURRENCY", 1))
+
+    @property
+    def uvicorn_loop(self) -> str:
+        # "auto" picks uvloop when it is installed
+        return getenv("UVICORN_LOOP", "auto")
+
+    @property
+    def uvicorn_http(self) -> str:
+        # "auto" picks httptools when it is installed
+        return getenv("UVICORN_HTTP", "auto")
+
+    @property
+    def uvicorn_backlog(self) -> int:
+        return int(getenv("UVICORN_BACKLOG", 2048))
+
+    @property
+    def uvicorn_keep_alive_seconds(self) -> int:
+        # longer than the usual 60s load balancer idle timeout, so the
+        # balancer (not us) closes idle connections
+        return int(getenv("UVICORN_KEEP_ALIVE_SECONDS", 75))
+
+    @property
+    def graceful_shutdown_seconds(self) -> int:
+        return int(getenv("GRACEFUL_SHUTDOWN_SECONDS", 30))
+
+    @property
+    def preload_datasources(self) -> list[str]:
+        # data sources whose scrapers are imported at startup, or ["all"];
+        # the others are imported on first use
+        value = getenv("PRELOAD_DATASOURCES", "").lower()
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    @property
+    def processor_pool_size(self) -> int:
+        return int(getenv("PROCESSOR_POOL_SIZE", 4))
+
+    @property
+    def batch_concurrency(self) -> int:
+        return int(getenv("BATCH_CONCURRENCY", 8))
+
+    @property
+    def job_workers(self) -> int:
+        return int(getenv("JOB_WORKERS", 2))
+
+    @property
+    def job_queue_size(self) -> int:
+        return int(getenv("JOB_QUEUE_SIZE", 100))
+
+    @property
+    def job_retention_seconds(self) -> int:
+        return int(getenv("JOB_RETENTION_SECONDS", 86400))
+
+    @property
+    def job_chunk_size(self) -> int:
+        return int(getenv("JOB_CHUNK_SIZE", 500))
+
+    @property
+    def post_store_enabled(self) -> bool:
+        return bool(int(getenv("POST_STORE_ENABLED", 1)))
+
+    @property
+    def post_store_batch_size(self) -> int:
+        return int(getenv("POST_STORE_BATCH_SIZE", 1000))
+
+    @property
+    def post_store_window_ttl_seconds(self) -> int:
+        return int(getenv("POST_STORE_WINDOW_TTL_SECONDS", 30 * 86400))
+
+    @property
+    def post_store_post_ttl_seconds(self) -> int:
+        return int(getenv("POST_STORE_POST_TTL_SECONDS", 90 * 86400))
+
+    @property
+    def cursor_max_age_seconds(self) -> int:
+        return int(getenv("CURSOR_MAX_AGE_SECONDS", 3600))
+
+    @property
+    def rate_limit_enabled(self) -> bool:
+        return bool(int(getenv("RATE_LIMIT_ENABLED", 1)))
+
+    @property
+    def rate_limit_per_minute(self) -> float:
+        return float(getenv("RATE_LIMIT_PER_MINUTE", 60))
+
+    @property
+    def rate_limit_burst(self) -> int:
+        return int(getenv("RATE_LIMIT_BURST", 20))
+
+    @property
+    def rate_limit_max_in_flight(self) -> int:
+        return int(getenv("RATE_LIMIT_MAX_IN_FLIGHT", 4))
+
+    @property
+    def rate_limit_exempt_cache_hits(self) -> bool:
+        return bool(int(getenv("RATE_LIMIT_EXEMPT_CACHE_HITS", 1)))
+
 
 config = Config()
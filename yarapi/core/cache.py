@@ -1,26 +1,148 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import sys
 import time
 import threading
 from collections import OrderedDict
+from datetime import datetime, timedelta
 from typing import Union
 import json
+import zlib
+
+from bson.errors import InvalidDocument
+from pymongo.errors import PyMongoError
+
 from yarapi.config import config
+from yarapi.core.database import CacheCollection
+from yarapi.core.metrics import registry
+from yarapi.utils.serialization import dumps, loads
 
 
-class LRUTTLCache:
+class CachedPayload:
     """
-    Thread-safe in-memory LRU cache with per-key TTL.
-    - Evicts expired items on access/set.
-    - Enforces maxsize by LRU (least recently used).
+    A cached result kept as one serialized JSON blob, optionally
+    zlib-compressed, instead of live Python objects.
+    - `json_bytes()` returns the JSON body ready to be written to a response.
+    - `load()` rebuilds the Python objects when they are really needed.
     """
 
-    def __init__(self, maxsize: int = 500, default_ttl: float = 3600.0):
-        self._store: "OrderedDict[object, tuple[float, object]]" = OrderedDict()
-        self._lock = threading.RLock()
-        self._maxsize = int(maxsize)
-        self._default_ttl = float(default_ttl)
+    __slots__ = ("blob", "compressed", "raw_size", "count", "_checksum")
 
-    def _now(self) -> float:
-        return time.monotonic()
+    def __init__(
+        self,
+        blob: bytes,
+        compressed: bool,
+        raw_size: int,
+        count: int,
+        checksum: int | None = None,
+    ):
+        self.blob = blob
+        self.compressed = compressed
+        self.raw_size = raw_size
+        self.count = count
+        self._checksum = checksum
+
+    @classmethod
+    def pack(cls, value, compress: bool = False) -> "CachedPayload":
+        raw = dumps(value)
+        count = len(value) if isinstance(value, list) else 1
+        blob = zlib.compress(raw, config.cache_compression_level) if compress else raw
+        return cls(blob, compress, len(raw), count, zlib.crc32(raw))
+
+    def json_bytes(self) -> bytes:
+        if self.compressed:
+            return zlib.decompress(self.blob)
+        return self.blob
+
+    def load(self):
+        return loads(self.json_bytes())
+
+    def checksum(self) -> int:
+        """CRC-32 of the JSON, whether or not it is stored compressed."""
+        if self._checksum is None:
+            self._checksum = zlib.crc32(self.json_bytes())
+        return self._checksum
+
+    def __sizeof__(self) -> int:
+        return object.__sizeof__(self) + sys.getsizeof(self.blob)
+
+
+class CachedResults(list):
+    """
+    A cached list of results kept as live objects, remembering the
+    checksum of its JSON so it is only serialized once for cursors.
+    """
+
+    __slots__ = ("_checksum",)
+
+    def __init__(self, items=()):
+        super().__init__(items)
+        self._checksum = None
+
+    def checksum(self) -> int:
+        if self._checksum is None:
+            self._checksum = zlib.crc32(dumps(self))
+        return self._checksum
+
+
+def estimate_size(value) -> int:
+    """
+    Cheap size in bytes of a cached value, without walking its objects.
+    - Packed payloads count their stored blob (see `__sizeof__`).
+    - Anything else counts its serialized JSON, or its shallow size when it
+      cannot be serialized.
+    """
+    if isinstance(value, CachedPayload):
+        return sys.getsizeof(value)
+    try:
+        return len(dumps(value))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+
+def result_checksum(value) -> int:
+    """
+    CRC-32 of the JSON of a cached result, to tell whether it has been
+    replaced. It is remembered on packed results; other live objects are
+    serialized each time.
+    """
+    if isinstance(value, (CachedPayload, CachedResults)):
+        return value.checksum()
+    return zlib.crc32(dumps(value))
+
+
+def pack_payload(value):
+    """
+    Converts a result into the representation selected by
+    `config.cache_storage`: objects (as is), json or zlib.
+    """
+    storage = config.cache_storage
+    if storage == "objects":
+        return CachedResults(value) if isinstance(value, list) else value
+    if storage in ("json", "zlib"):
+        return CachedPayload.pack(value, compress=storage == "zlib")
+    raise ValueError(f"Unknown cache storage: {storage}")
+
+
+class CacheBackend:
+    """
+    Interface shared by every cache backend.
+    - `get_with_ttl` returns (value, ttl_remaining_seconds) or (None, 0).
+    - `set` stores a value for `ttl` seconds (or the backend default).
+    - Backends that support stale-while-revalidate keep values for
+      `stale_ttl` more seconds; only `get_entry` returns them, flagged stale.
+    - Lookups are counted as hits, stale hits or misses.
+    - `aget`, `aget_with_ttl`, `aget_entry` and `aset` are the versions to
+      use from the event loop. By default they call the synchronous
+      methods, which is fine for in-memory backends; backends doing I/O
+      override them.
+    """
+
+    hits = 0
+    stale_hits = 0
+    misses = 0
 
     def serialize_key(self, data: Union[str, int, dict, list]) -> str:
         val = None
@@ -32,78 +154,763 @@ class LRUTTLCache:
 
         return val
 
+    def make_key(self, prefix: str, data: Union[str, int, dict, list]) -> str:
+        """
+        Builds a fixed-length key: `prefix` plus a 128-bit BLAKE2 digest of
+        the serialized data, so long request bodies are not kept as keys.
+        """
+        digest = hashlib.blake2b(
+            self.serialize_key(data).encode("utf-8"), digest_size=16
+        ).hexdigest()
+        return f"{prefix}:{digest}"
+
+    def _count(self, value, stale: bool = False) -> None:
+        if value is None:
+            self.misses += 1
+        elif stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+
+    def lookup_stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+    def get_with_ttl(self, key):
+        raise NotImplementedError
+
+    def set(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        raise NotImplementedError
+
+    def pop(self, key, default=None):
+        raise NotImplementedError
+
+    def get_entry(self, key):
+        """
+        Returns (value, ttl_remaining_seconds, stale), or (None, 0, False).
+        For stale values the TTL is the time left before they are dropped.
+        """
+        value, ttl_left = self.get_with_ttl(key)
+        return value, ttl_left, False
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def get(self, key):
+        """
+        Returns value if fresh, else None.
+        """
+        value, _ = self.get_with_ttl(key)
+        return value
+
+    def exists(self, key) -> bool:
+        return self.get(key) is not None
+
+    async def aget_with_ttl(self, key):
+        return self.get_with_ttl(key)
+
+    async def aget_entry(self, key):
+        return self.get_entry(key)
+
+    async def aget(self, key):
+        value, _ = await self.aget_with_ttl(key)
+        return value
+
+    async def aset(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        self.set(key, value, ttl, stale_ttl)
+
+    def stats(self) -> dict:
+        return self.lookup_stats()
+
+
+class LRUTTLCache(CacheBackend):
+    """
+    Thread-safe in-memory LRU cache with per-key TTL.
+    - Evicts expired items on access/set.
+    - Enforces maxsize by LRU (least recently used), and optionally a
+      byte budget (`max_bytes`) using each entry's estimated size.
+    - Expiry times live in a min-heap, so pruning only touches expired
+      entries instead of scanning the whole store.
+    - Entries stay fresh for `ttl` and are then kept, stale, for another
+      `stale_ttl` seconds (0 by default).
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 500,
+        default_ttl: float = 3600.0,
+        max_bytes: int | None = None,
+        default_stale_ttl: float = 0.0,
+    ):
+        # key -> (expires_at, value, size_bytes, fresh_until)
+        self._store: "OrderedDict[object, tuple[float, object, int, float]]" = (
+            OrderedDict()
+        )
+        # (expires_at, seq, key); entries whose key was overwritten or
+        # removed are skipped lazily and dropped on compaction
+        self._expiry: "list[tuple[float, int, object]]" = []
+        self._seq = itertools.count()
+        self._lock = threading.RLock()
+        self._maxsize = int(maxsize)
+        self._max_bytes = int(max_bytes) if max_bytes else None
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._default_ttl = float(default_ttl)
+        self._default_stale_ttl = float(default_stale_ttl)
+        self._sweeper: threading.Thread | None = None
+        self._stop_sweeper = threading.Event()
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _remove(self, key):
+        item = self._store.pop(key, None)
+        if item is not None:
+            self._bytes -= item[2]
+        return item
+
     def _prune_expired(self) -> None:
         t = self._now()
-        expired = [k for k, (exp, _) in self._store.items() if exp <= t]
-        for k in expired:
-            self._store.pop(k, None)
+        heap = self._expiry
+        while heap and heap[0][0] <= t:
+            exp, _, key = heapq.heappop(heap)
+            item = self._store.get(key)
+            if item is not None and item[0] == exp:
+                self._remove(key)
+                self.expirations += 1
+
+        if len(heap) > 2 * len(self._store) + 64:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._expiry = [
+            (item[0], next(self._seq), key) for key, item in self._store.items()
+        ]
+        heapq.heapify(self._expiry)
 
     def _enforce_size(self) -> None:
-        while len(self._store) > self._maxsize:
+        while len(self._store) > self._maxsize or (
+            self._max_bytes is not None and self._bytes > self._max_bytes
+        ):
             # pop least-recently-used
-            self._store.popitem(last=False)
+            _, item = self._store.popitem(last=False)
+            self._bytes -= item[2]
+            self.evictions += 1
 
     def _ttl_remaining(self, exp: float) -> float:
         return max(0.0, exp - self._now())
 
+    @property
+    def currsize(self) -> int:
+        return len(self._store)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def stats(self) -> dict:
+        return {
+            **self.lookup_stats(),
+            "entries": len(self._store),
+            "bytes": self._bytes,
+            "max_entries": self._maxsize,
+            "max_bytes": self._max_bytes,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _live_item(self, key):
+        """
+        Returns the entry unless it is missing or past its stale period,
+        refreshing its LRU position. Callers hold the lock.
+        """
+        item = self._store.get(key)
+        if item is None:
+            return None
+        if item[0] <= self._now():
+            # expired -> drop eagerly
+            self._remove(key)
+            self.expirations += 1
+            return None
+        # refresh LRU position
+        self._store.move_to_end(key, last=True)
+        return item
+
     def exists(self, key) -> bool:
         with self._lock:
-            item = self._store.get(key)
-            if item is None:
-                return False
-            exp, _ = item
-            if exp <= self._now():
-                # expired -> drop eagerly
-                self._store.pop(key, None)
-                return False
-            # refresh LRU position
-            self._store.move_to_end(key, last=True)
-            return True
+            item = self._live_item(key)
+            return item is not None and item[3] > self._now()
 
     def get(self, key):
         """
         Returns value if fresh, else None.
         """
         with self._lock:
-            item = self._store.get(key)
-            if item is None:
-                return None
-            exp, val = item
-            if exp <= self._now():
-                self._store.pop(key, None)
+            item = self._live_item(key)
+            if item is None or item[3] <= self._now():
+                self._count(None)
                 return None
-            # refresh LRU
-            self._store.move_to_end(key, last=True)
-            return val
+            self._count(item[1])
+            return item[1]
 
     def get_with_ttl(self, key):
         """
         Returns (value, ttl_remaining_seconds) if fresh, else (None, 0).
         """
         with self._lock:
-            item = self._store.get(key)
-            if item is None:
-                return None, 0
-            exp, val = item
-            if exp <= self._now():
-                self._store.pop(key, None)
+            item = self._live_item(key)
+            if item is None or item[3] <= self._now():
+                self._count(None)
                 return None, 0
-            self._store.move_to_end(key, last=True)
-            return val, int(self._ttl_remaining(exp))
+            self._count(item[1])
+            return item[1], int(self._ttl_remaining(item[3]))
 
-    def set(self, key, value, ttl: float | None = None) -> None:
+    def get_entry(self, key):
         with self._lock:
+            item = self._live_item(key)
+            if item is None:
+                self._count(None)
+                return None, 0, False
+            exp, val, _, fresh_until = item
+            if fresh_until > self._now():
+                self._count(val)
+                return val, int(self._ttl_remaining(fresh_until)), False
+            self._count(val, stale=True)
+            return val, int(self._ttl_remaining(exp)), True
+
+    def set(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+        size: int | None = None,
+    ) -> None:
+        """
+        Stores `value`; `size` is its footprint in bytes, estimated from its
+        serialized size when not given. Values larger than the whole budget are not
+        stored.
+        """
+        if size is None:
+            size = estimate_size(value) if self._max_bytes is not None else 0
+
+        with self._lock:
+            self._remove(key)
+            if self._max_bytes is not None and size > self._max_bytes:
+                return
             effective_ttl = float(ttl if ttl is not None else self._default_ttl)
-            exp = self._now() + effective_ttl
-            self._store[key] = (exp, value)
-            self._store.move_to_end(key, last=True)
+            effective_stale_ttl = float(
+                stale_ttl if stale_ttl is not None else self._default_stale_ttl
+            )
+            fresh_until = self._now() + effective_ttl
+            exp = fresh_until + effective_stale_ttl
+            self._store[key] = (exp, value, size, fresh_until)
+            self._bytes += size
+            heapq.heappush(self._expiry, (exp, next(self._seq), key))
             # house-keeping
             self._prune_expired()
             self._enforce_size()
 
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._remove(key)
+            if item is None:
+                return default
+            return item[1]
+
     def clear(self) -> None:
         with self._lock:
             self._store.clear()
+            self._expiry.clear()
+            self._bytes = 0
+
+    def start_sweeper(self, interval: float) -> None:
+        """
+        Prunes expired entries every `interval` seconds from a daemon thread,
+        so memory is released even when nothing is being written.
+        """
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        self._stop_sweeper.clear()
+
+        def sweep():
+            while not self._stop_sweeper.wait(interval):
+                with self._lock:
+                    self._prune_expired()
+
+        self._sweeper = threading.Thread(
+            target=sweep, name="lru-ttl-cache-sweeper", daemon=True
+        )
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop_sweeper.set()
+        self._sweeper = None
+
+
+class MongoCache(CacheBackend):
+    """
+    Cache shared by every replica and worker, stored in a Mongo collection.
+    - Values are stored as JSON under a SHA-256 digest of the key;
+      `CachedPayload` blobs are stored as binary as they are.
+    - A TTL index reaps expired documents; reads also check `expires_at`
+      because the reaper only runs about once a minute.
+    - Stale values are kept until `expires_at` and served until
+      `fresh_until` through `get_with_ttl`.
+    - The async methods go through motor; the synchronous ones block on
+      pymongo and are meant for scripts and tests.
+    - Mongo errors are logged and treated as misses. Values too large for
+      a document (16 MB) are not cached.
+    """
+
+    def __init__(
+        self,
+        collection: CacheCollection,
+        default_ttl: float = 3600.0,
+        default_stale_ttl: float = 0.0,
+    ):
+        self._collection = collection
+        self._default_ttl = float(default_ttl)
+        self._default_stale_ttl = float(default_stale_ttl)
+
+    def _id(self, key) -> str:
+        return hashlib.sha256(str(key).encode("utf-8")).hexdigest()
+
+    def _fresh(self, entry):
+        value, ttl_left, stale = entry
+        if stale:
+            value, ttl_left = None, 0
+        self._count(value)
+        return value, ttl_left
+
+    def _counted(self, entry):
+        value, ttl_left, stale = entry
+        self._count(value, stale)
+        return entry
+
+    def get_with_ttl(self, key):
+        return self._fresh(self._find_entry(key))
+
+    def get_entry(self, key):
+        return self._counted(self._find_entry(key))
+
+    async def aget_with_ttl(self, key):
+        return self._fresh(await self._afind_entry(key))
+
+    async def aget_entry(self, key):
+        return self._counted(await self._afind_entry(key))
+
+    def _find_entry(self, key):
+        try:
+            doc = self._collection.objects_sync.find_one({"_id": self._id(key)})
+        except PyMongoError as e:
+            print(f"Shared cache read failed: {e}")
+            return None, 0, False
+        return self._entry(doc)
+
+    async def _afind_entry(self, key):
+        try:
+            doc = await self._collection.objects.find_one({"_id": self._id(key)})
+        except PyMongoError as e:
+            print(f"Shared cache read failed: {e}")
+            return None, 0, False
+        return self._entry(doc)
+
+    def _entry(self, doc: dict | None):
+        if doc is None:
+            return None, 0, False
+        now = datetime.utcnow()
+        ttl_left = (doc["expires_at"] - now).total_seconds()
+        if ttl_left <= 0:
+            return None, 0, False
+        fresh_left = (doc.get("fresh_until", doc["expires_at"]) - now).total_seconds()
+        if fresh_left > 0:
+            return self._decode(doc), int(fresh_left), False
+        return self._decode(doc), int(ttl_left), True
+
+    def _encode(self, value) -> dict:
+        if isinstance(value, CachedPayload):
+            return {
+                "payload": value.blob,
+                "compressed": value.compressed,
+                "raw_size": value.raw_size,
+                "count": value.count,
+                "checksum": value.checksum(),
+            }
+        return {"value": dumps(value).decode("utf-8")}
+
+    def _decode(self, doc: dict):
+        if "payload" in doc:
+            return CachedPayload(
+                doc["payload"],
+                doc["compressed"],
+                doc["raw_size"],
+                doc["count"],
+                doc.get("checksum"),
+            )
+        return loads(doc["value"])
+
+    def _document(self, key, value, ttl: float | None, stale_ttl: float | None) -> dict:
+        effective_ttl = float(ttl if ttl is not None else self._default_ttl)
+        effective_stale_ttl = float(
+            stale_ttl if stale_ttl is not None else self._default_stale_ttl
+        )
+        fresh_until = datetime.utcnow() + timedelta(seconds=effective_ttl)
+        return {
+            "_id": self._id(key),
+            **self._encode(value),
+            "fresh_until": fresh_until,
+            "expires_at": fresh_until + timedelta(seconds=effective_stale_ttl),
+        }
+
+    def set(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        doc = self._document(key, value, ttl, stale_ttl)
+        try:
+            self._collection.objects_sync.replace_one(
+                {"_id": doc["_id"]}, doc, upsert=True
+            )
+        except (PyMongoError, InvalidDocument) as e:
+            print(f"Shared cache write failed: {e}")
+
+    async def aset(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        doc = self._document(key, value, ttl, stale_ttl)
+        try:
+            await self._collection.objects.replace_one(
+                {"_id": doc["_id"]}, doc, upsert=True
+            )
+        except (PyMongoError, InvalidDocument) as e:
+            print(f"Shared cache write failed: {e}")
+
+    def pop(self, key, default=None):
+        try:
+            doc = self._collection.objects_sync.find_one_and_delete(
+                {"_id": self._id(key)}
+            )
+        except PyMongoError as e:
+            print(f"Shared cache delete failed: {e}")
+            return default
+        if doc is None:
+            return default
+        return self._decode(doc)
+
+    def clear(self) -> None:
+        try:
+            self._collection.objects_sync.delete_many({})
+        except PyMongoError as e:
+            print(f"Shared cache clear failed: {e}")
+
+
+class TieredCache(CacheBackend):
+    """
+    In-memory LRU in front of a shared backend.
+    - Reads try the local tier first, then the shared one, copying shared
+      hits into the local tier for their remaining TTL.
+    - Writes go to both tiers. Stale shared values are served but not
+      copied into the local tier.
+    """
+
+    def __init__(self, local: LRUTTLCache, shared: CacheBackend):
+        self._local = local
+        self._shared = shared
+
+    def get_with_ttl(self, key):
+        value, ttl_left = self._local.get_with_ttl(key)
+        if value is None:
+            value, ttl_left = self._shared.get_with_ttl(key)
+            if value is not None and ttl_left > 0:
+                self._local.set(key, value, ttl_left)
+        self._count(value)
+        return value, ttl_left
+
+    def get_entry(self, key):
+        value, ttl_left, stale = self._local.get_entry(key)
+        if value is None:
+            value, ttl_left, stale = self._shared.get_entry(key)
+            if value is not None and not stale and ttl_left > 0:
+                self._local.set(key, value, ttl_left)
+        self._count(value, stale)
+        return value, ttl_left, stale
+
+    def set(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        self._local.set(key, value, ttl, stale_ttl)
+        self._shared.set(key, value, ttl, stale_ttl)
+
+    async def aget_with_ttl(self, key):
+        value, ttl_left = self._local.get_with_ttl(key)
+        if value is None:
+            value, ttl_left = await self._shared.aget_with_ttl(key)
+            if value is not None and ttl_left > 0:
+                self._local.set(key, value, ttl_left)
+        self._count(value)
+        return value, ttl_left
+
+    async def aget_entry(self, key):
+        value, ttl_left, stale = self._local.get_entry(key)
+        if value is None:
+            value, ttl_left, stale = await self._shared.aget_entry(key)
+            if value is not None and not stale and ttl_left > 0:
+                self._local.set(key, value, ttl_left)
+        self._count(value, stale)
+        return value, ttl_left, stale
+
+    async def aset(
+        self,
+        key,
+        value,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+    ) -> None:
+        self._local.set(key, value, ttl, stale_ttl)
+        await self._shared.aset(key, value, ttl, stale_ttl)
+
+    def stats(self) -> dict:
+        return {
+            **self._local.stats(),
+            **self.lookup_stats(),
+            "local": self._local.lookup_stats(),
+            "shared": self._shared.lookup_stats(),
+        }
+
+    def pop(self, key, default=None):
+        local = self._local.pop(key, default)
+        shared = self._shared.pop(key, default)
+        return local if local is not default else shared
+
+    def clear(self) -> None:
+        self._local.clear()
+        self._shared.clear()
+
+
+def build_cache(
+    maxsize: int,
+    default_ttl: float,
+    max_bytes: int | None = None,
+    default_stale_ttl: float = 0.0,
+) -> CacheBackend:
+    """
+    Builds the cache selected by `config.cache_backend`:
+    memory (default), mongo, or tiered (memory in front of mongo).
+    """
+    backend = config.cache_backend
+
+    def shared():
+        return MongoCache(
+            CacheCollection(),
+            default_ttl=default_ttl,
+            default_stale_ttl=default_stale_ttl,
+        )
+
+    if backend == "mongo":
+        return shared()
+    if backend not in ("memory", "tiered"):
+        raise ValueError(f"Unknown cache backend: {backend}")
+
+    local = LRUTTLCache(
+        maxsize=maxsize,
+        default_ttl=default_ttl,
+        max_bytes=max_bytes,
+        default_stale_ttl=default_stale_ttl,
+    )
+    if config.cache_sweep_seconds > 0:
+        local.start_sweeper(config.cache_sweep_seconds)
+    if backend == "tiered":
+        return TieredCache(local, shared())
+    return local
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task.
+    - Every waiter gets the same result, or the same exception.
+    - A cancelled waiter only cancels the shared task if nobody else is
+      still waiting for it.
+    """
+
+    def __init__(self):
+        self._calls: dict[object, _Call] = {}
+
+    def _forget(self, key, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    async def do(self, key, fn):
+        """
+        Awaits `fn()` once per key among concurrent callers.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if call.waiters == 1 and not call.task.done():
+                # last one out: stop the work and let new callers start over
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+
+class BackgroundRefresher:
+    """
+    Refreshes stale cache entries from background tasks.
+    - At most one refresh per key, and at most `max_concurrency` at once;
+      extra requests are skipped, the stale value keeps being served.
+    - Failures are counted and logged, never raised to the caller.
+    """
+
+    def __init__(self, max_concurrency: int):
+        self._max_concurrency = int(max_concurrency)
+        self._pending: dict[object, asyncio.Task] = {}
+        self.refreshed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def schedule(self, key, fn) -> bool:
+        """
+        Starts `fn()` in the background unless `key` is already being
+        refreshed or the concurrency limit is reached.
+        """
+        if key in self._pending:
+            return False
+        if len(self._pending) >= self._max_concurrency:
+            self.skipped += 1
+            return False
+        self._pending[key] = asyncio.create_task(self._run(key, fn))
+        return True
+
+    async def _run(self, key, fn) -> None:
+        try:
+            await fn()
+            self.refreshed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._pending.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._pending),
+            "refreshed": self.refreshed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+        }
+
+
+def _build_endpoint_cache(max_mb: int, stale_ttl: float = 0.0) -> CacheBackend:
+    return build_cache(
+        maxsize=config.cache_maxsize,
+        default_ttl=config.cache_ttl_seconds,
+        max_bytes=max_mb * 1024 * 1024 if max_mb > 0 else None,
+        default_stale_ttl=stale_ttl,
+    )
+
+
+search_cache = _build_endpoint_cache(
+    config.cache_search_max_mb, config.cache_stale_ttl_seconds
+)
+profile_cache = _build_endpoint_cache(
+    config.cache_profile_max_mb, config.cache_stale_ttl_seconds
+)
+comments_cache = _build_endpoint_cache(
+    config.cache_comments_max_mb, config.cache_stale_ttl_seconds
+)
+timeseries_cache = _build_endpoint_cache(
+    config.cache_timeseries_max_mb, config.cache_stale_ttl_seconds
+)
+shard_cache = _build_endpoint_cache(config.cache_shard_max_mb)
+inflight = SingleFlight()
+refresher = BackgroundRefresher(config.cache_refresh_concurrency)
+
+
+_CACHE_METRICS = (
+    ("hits", "yarapi_cache_hits_total", "counter", "Fresh cache hits."),
+    ("stale_hits", "yarapi_cache_stale_hits_total", "counter", "Stale cache hits."),
+    ("misses", "yarapi_cache_misses_total", "counter", "Cache misses."),
+    ("evictions", "yarapi_cache_evictions_total", "counter", "Size-limit evictions."),
+    ("expirations", "yarapi_cache_expirations_total", "counter", "TTL expirations."),
+    ("entries", "yarapi_cache_entries", "gauge", "Entries in the local cache."),
+    ("bytes", "yarapi_cache_bytes", "gauge", "Estimated bytes in the local cache."),
+    ("max_bytes", "yarapi_cache_max_bytes", "gauge", "Byte budget of the local cache."),
+)
+
+
+def _collect_metrics():
+    stats = {
+        "search": search_cache.stats(),
+        "profile": profile_cache.stats(),
+        "comments": comments_cache.stats(),
+        "timeseries": timeseries_cache.stats(),
+        "shard": shard_cache.stats(),
+    }
+    for field, name, type_, help in _CACHE_METRICS:
+        samples = [
+            ({"cache": cache_name}, cache_stats[field])
+            for cache_name, cache_stats in stats.items()
+            if cache_stats.get(field) is not None
+        ]
+        yield name, type_, help, samples
+
+    refresh = refresher.stats()
+    outcomes = [
+        ({"outcome": o}, refresh[o]) for o in ("refreshed", "failed", "skipped")
+    ]
+    yield "yarapi_cache_refreshes_total", "counter", "Background refreshes.", outcomes
+    running = [({}, refresh["in_flight"])]
+    yield "yarapi_cache_refreshes_in_flight", "gauge", "Refreshes running.", running
 
 
-cache = LRUTTLCache(maxsize=1000, default_ttl=config.cache_ttl_seconds)
+registry.register_collector(_collect_metrics)
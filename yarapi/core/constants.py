@@ -1,8 +1,34 @@
+import importlib
+from collections.abc import Mapping
+from typing import Iterable
+
 from yarapi.models.schemas import DataSource
-from open_sea.post_processing.instagram import InstagramPostProcessing
-from open_sea.post_processing.facebook import FacebookPostProcessing
-from open_sea.post_processing.tiktok import TikTokPostProcessing
-from open_sea.post_processing.youtube import YouTubePostProcessing
+
+
+class LazyClassMap(Mapping):
+    """
+    Maps keys to classes given as `module:Class` paths. Each module is
+    imported on first access, so the scraping dependencies of unused data
+    sources are never loaded.
+    """
+
+    def __init__(self, paths: dict):
+        self._paths = paths
+        self._classes = {}
+
+    def __getitem__(self, key):
+        cls = self._classes.get(key)
+        if cls is None:
+            module, name = self._paths[key].split(":")
+            cls = self._classes[key] = getattr(importlib.import_module(module), name)
+        return cls
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
 
 SITE_MAP = {
     DataSource.instagram: "instagram.com",
@@ -15,9 +41,39 @@ SUFFIX_MAP = {
     DataSource.facebook: "inurl:photo OR inurl:photos OR inurl:video OR inurl:post OR inurl:watch",
     DataSource.tiktok: "inurl:/video/",
 }
-PROCESSOR_MAP = {
-    DataSource.instagram: InstagramPostProcessing,
-    DataSource.facebook: FacebookPostProcessing,
-    DataSource.tiktok: TikTokPostProcessing,
-    DataSource.youtube: YouTubePostProcessing,
-}
+SERP_SEARCHER = "open_sea.searcher.serp_searcher:SerpSearcher"
+SEARCHER_MAP = LazyClassMap(
+    {
+        DataSource.instagram: SERP_SEARCHER,
+        DataSource.facebook: SERP_SEARCHER,
+        DataSource.tiktok: SERP_SEARCHER,
+        DataSource.youtube: SERP_SEARCHER,
+        DataSource.twitter: "open_sea.searcher.x_searcher:XSearcher",
+    }
+)
+PROCESSOR_MAP = LazyClassMap(
+    {
+        DataSource.instagram: "open_sea.post_processing.instagram:InstagramPostProcessing",
+        DataSource.facebook: "open_sea.post_processing.facebook:FacebookPostProcessing",
+        DataSource.tiktok: "open_sea.post_processing.tiktok:TikTokPostProcessing",
+        DataSource.youtube: "open_sea.post_processing.youtube:YouTubePostProcessing",
+        DataSource.twitter: "open_sea.post_processing.x:XPostProcessing",
+    }
+)
+
+
+def resolve_datasources(names: Iterable[str] | None) -> list[DataSource]:
+    """Data sources named in a setting; all of them if empty or "all" is listed."""
+    if not names or "all" in names:
+        return list(DataSource)
+    return [DataSource(name) for name in names]
+
+
+def warm_up(datasources: Iterable[str] | None = None) -> None:
+    """
+    Imports the searcher and post-processor of the given data sources ahead
+    of the first request.
+    """
+    for datasource in resolve_datasources(datasources):
+        SEARCHER_MAP[datasource]
+        PROCESSOR_MAP[datasource]
@@ -1,6 +1,7 @@
 import motor.motor_asyncio
 import pymongo
 from pymongo.collection import Collection
+from pymongo.errors import OperationFailure
 
 from yarapi.config import config
 
@@ -37,4 +38,63 @@ class UsersCollection(BaseCollection):
         self._ensure_indexes()
 
 
+class CacheCollection(BaseCollection):
+    def _ensure_indexes(self):
+        self._pymongo_collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def __init__(self):
+        super().__init__(config.mongo_db_name, "api_cache")
+        self._ensure_indexes()
+
+
+class JobsCollection(BaseCollection):
+    def _ensure_indexes(self):
+        self._pymongo_collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def __init__(self):
+        super().__init__(config.mongo_db_name, "search_jobs")
+        self._ensure_indexes()
+
+
+class JobResultsCollection(BaseCollection):
+    def _ensure_indexes(self):
+        self._pymongo_collection.create_index([("job_id", 1), ("start", 1)])
+        self._pymongo_collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def __init__(self):
+        super().__init__(config.mongo_db_name, "search_job_results")
+        self._ensure_indexes()
+
+
+class PostsCollection(BaseCollection):
+    def _ensure_indexes(self):
+        self._pymongo_collection.create_index(
+            [("datasource", 1), ("key", 1)], unique=True
+        )
+        ttl = config.post_store_post_ttl_seconds
+        try:
+            self._pymongo_collection.create_index("updated_at", expireAfterSeconds=ttl)
+        except OperationFailure:
+            # the index exists without a TTL, or with another one
+            self._pymongo_collection.database.command(
+                "collMod",
+                self._pymongo_collection.name,
+                index={"keyPattern": {"updated_at": 1}, "expireAfterSeconds": ttl},
+            )
+
+    def __init__(self):
+        super().__init__(config.mongo_db_name, "posts")
+        self._ensure_indexes()
+
+
+class CrawledWindowsCollection(BaseCollection):
+    def _ensure_indexes(self):
+        self._pymongo_collection.create_index([("datasource", 1), ("since", 1)])
+        self._pymongo_collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def __init__(self):
+        super().__init__(config.mongo_db_name, "crawled_windows")
+        self._ensure_indexes()
+
+
 users_collection = UsersCollection()
@@ -0,0 +1,204 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from pymongo.errors import PyMongoError
+
+from yarapi.config import config
+from yarapi.core.database import BaseCollection, JobResultsCollection, JobsCollection
+from yarapi.core.search_service import iter_search
+from yarapi.models.schemas import DataSource, SearchRequest
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class SearchJobs:
+    """
+    Runs searches in the background on a bounded pool of in-process
+    workers, storing their state in `jobs` and their posts in `results`.
+    - Posts are stored as each shard completes, in chunks of at most
+      `chunk_size` posts holding their [start, end) offsets, so partial
+      results can be paged while the job runs.
+    - Jobs and their results expire `retention` seconds after they finish
+      (or are created, until then) through TTL indexes.
+    - The queue lives in this process: jobs queued or running when it
+      stops are marked as failed.
+    """
+
+    def __init__(
+        self,
+        jobs: BaseCollection,
+        results: BaseCollection,
+        workers: int,
+        queue_size: int,
+        retention: float,
+        chunk_size: int,
+    ):
+        self._jobs = jobs
+        self._results = results
+        self._workers = int(workers)
+        self._retention = timedelta(seconds=retention)
+        self._chunk_size = int(chunk_size)
+        self._queue: asyncio.Queue | None = None
+        self._queue_size = int(queue_size)
+        self._tasks: list[asyncio.Task] = []
+
+    async def submit(
+        self, datasource: DataSource, params: SearchRequest, owner: str
+    ) -> dict:
+        """Stores a queued job and hands it to the workers."""
+        if self._queue is None:
+            raise RuntimeError("Search jobs are not running")
+        if self._queue.full():
+            raise JobQueueFull("Too many search jobs queued, try again later")
+
+        now = datetime.utcnow()
+        job = {
+            "_id": uuid.uuid4().hex,
+            "owner": owner,
+            "datasource": datasource.value,
+            "request": params.dict(),
+            "status": "queued",
+            "results_count": 0,
+            "error": None,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "expires_at": now + self._retention,
+        }
+        await self._jobs.objects.insert_one(job)
+        try:
+            self._queue.put_nowait(job["_id"])
+        except asyncio.QueueFull:
+            # other submits filled the queue while the job was being stored
+            await self._finish(job["_id"], "failed", "Job queue full")
+            raise JobQueueFull("Too many search jobs queued, try again later")
+        return job
+
+    async def get(self, job_id: str, owner: str) -> dict | None:
+        return await self._jobs.objects.find_one({"_id": job_id, "owner": owner})
+
+    async def results(self, job_id: str, offset: int, limit: int) -> list:
+        """Posts [offset, offset + limit) of a job, as far as they are stored."""
+        cursor = self._results.objects.find(
+            {"job_id": job_id, "start": {"$lt": offset + limit}, "end": {"$gt": offset}}
+        ).sort("start", 1)
+        posts = []
+        async for chunk in cursor:
+            skip = max(0, offset - chunk["start"])
+            posts.extend(chunk["posts"][skip : skip + limit - len(posts)])
+        return posts
+
+    async def _store(self, job: dict, start: int, posts: list) -> None:
+        chunks = [
+            {
+                "job_id": job["_id"],
+                "start": start + i,
+                "end": start + i + len(posts[i : i + self._chunk_size]),
+                "posts": posts[i : i + self._chunk_size],
+                "expires_at": job["expires_at"],
+            }
+            for i in range(0, len(posts), self._chunk_size)
+        ]
+        await self._results.objects.insert_many(chunks, ordered=False)
+        await self._jobs.objects.update_one(
+            {"_id": job["_id"]}, {"$set": {"results_count": start + len(posts)}}
+        )
+
+    async def _finish(self, job_id: str, status: str, error: str | None = None):
+        now = datetime.utcnow()
+        expires_at = now + self._retention
+        await self._jobs.objects.update_one(
+            {"_id": job_id},
+            {
+                "$set": {
+                    "status": status,
+                    "error": error,
+                    "finished_at": now,
+                    "expires_at": expires_at,
+                }
+            },
+        )
+        await self._results.objects.update_many(
+            {"job_id": job_id}, {"$set": {"expires_at": expires_at}}
+        )
+
+    async def _run(self, job_id: str) -> None:
+        job = await self._jobs.objects.find_one_and_update(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {"status": "running", "started_at": datetime.utcnow()}},
+        )
+        if job is None:
+            return
+
+        try:
+            params = SearchRequest(**job["request"])
+            count = 0
+            async for batch in iter_search(DataSource(job["datasource"]), params):
+                await self._store(job, count, batch)
+                count += len(batch)
+        except asyncio.CancelledError:
+            await asyncio.shield(
+                self._finish(job_id, "failed", "Interrupted by server shutdown")
+            )
+            raise
+        except Exception as e:
+            print(f"Search job {job_id} failed: {e}")
+            await self._finish(job_id, "failed", str(e))
+        else:
+            await self._finish(job_id, "succeeded")
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except PyMongoError as e:
+                print(f"Search job {job_id} could not be updated: {e}")
+            finally:
+                self._queue.task_done()
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self._workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        queued = []
+        while self._queue is not None and not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        self._queue = None
+        if queued:
+            try:
+                await self._jobs.objects.update_many(
+                    {"_id": {"$in": queued}, "status": "queued"},
+                    {
+                        "$set": {
+                            "status": "failed",
+                            "error": "Interrupted by server shutdown",
+                            "finished_at": datetime.utcnow(),
+                        }
+                    },
+                )
+            except PyMongoError as e:
+                print(f"Failed to mark queued search jobs as failed: {e}")
+
+
+search_jobs = SearchJobs(
+    JobsCollection(),
+    JobResultsCollection(),
+    workers=config.job_workers,
+    queue_size=config.job_queue_size,
+    retention=config.job_retention_seconds,
+    chunk_size=config.job_chunk_size,
+)
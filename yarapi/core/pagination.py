@@ -0,0 +1,75 @@
+from fastapi import HTTPException, Query, status
+from itsdangerous import BadSignature, SignatureExpired
+
+from yarapi.config import config
+from yarapi.core.security import serializer
+
+CURSOR_SALT = "results-cursor"
+
+
+class Page:
+    """
+    `limit`/`cursor` query parameters. Without a limit the whole result is
+    returned, as before; with one, responses carry a `next_cursor`.
+    """
+
+    def __init__(
+        self,
+        limit: int | None = Query(
+            None, gt=0, le=10000, description="Maximum number of items per page."
+        ),
+        cursor: str | None = Query(
+            None, description="`next_cursor` of the previous page."
+        ),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+
+    @property
+    def requested(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+
+def make_cursor(
+    key: str,
+    offset: int,
+    limit: int,
+    total: int | None = None,
+    checksum: int | None = None,
+) -> str:
+    """
+    Signed cursor pointing at `offset` of the result stored under `key`.
+    `total` and `checksum` pin the result the pages were cut from.
+    """
+    return serializer.dumps(
+        {"k": key, "o": offset, "l": limit, "n": total, "c": checksum},
+        salt=CURSOR_SALT,
+    )
+
+
+def read_cursor(cursor: str, key: str) -> dict:
+    """
+    Verifies a cursor and that it belongs to `key`, returning its
+    `offset`, `limit`, `total` and `checksum`.
+    """
+    try:
+        data = serializer.loads(
+            cursor, salt=CURSOR_SALT, max_age=config.cursor_max_age_seconds
+        )
+    except SignatureExpired:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Cursor expired")
+    except BadSignature:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+    if data.get("k") != key:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor does not belong to this request",
+        )
+    return {
+        "offset": data["o"],
+        "limit": data["l"],
+        "total": data.get("n"),
+        "checksum": data.get("c"),
+    }
@@ -0,0 +1,160 @@
+import asyncio
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson.errors import InvalidDocument
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from yarapi.config import config
+from yarapi.core.database import (
+    BaseCollection,
+    CrawledWindowsCollection,
+    PostsCollection,
+)
+
+
+def post_key(post: Dict[str, Any]) -> str | None:
+    """
+    Identity of a post for de-duplication across shards, or None if it
+    has neither an id nor a url.
+    """
+    for field in ("id", "post_id", "url", "link"):
+        value = post.get(field)
+        if value:
+            return f"{field}:{value}"
+    return None
+
+
+class PostStore:
+    """
+    Persistent store of crawled posts and of the closed date windows they
+    came from, so historical windows are served from Mongo instead of
+    being crawled again once the in-memory caches expire.
+    - Posts are upserted by (datasource, post key) with unordered bulk
+      writes of `batch_size`; a post seen in several windows is stored once.
+      Posts not seen again for `POST_STORE_POST_TTL_SECONDS` are reaped by
+      a TTL index; windows missing some of their posts are crawled again.
+    - A window document keeps the keys of its posts in order, plus the
+      posts without a key inline, and the `max_results` it was crawled with.
+      It expires `window_ttl` seconds after the crawl, so the window is
+      crawled again from time to time.
+    - Windows are saved from background tasks, off the request path.
+    - Mongo errors, and posts that cannot be stored as a document, are
+      printed and treated as a miss.
+    """
+
+    def __init__(
+        self,
+        posts: BaseCollection,
+        windows: BaseCollection,
+        batch_size: int,
+        window_ttl: float,
+    ):
+        self._posts = posts
+        self._windows = windows
+        self._batch_size = int(batch_size)
+        self._window_ttl = timedelta(seconds=window_ttl)
+        self._pending: set[asyncio.Task] = set()
+
+    async def save_posts(self, datasource: str, posts: List[dict]) -> List[str | None]:
+        """Upserts `posts` and returns their keys."""
+        now = datetime.utcnow()
+        keys = [post_key(post) for post in posts]
+        operations = [
+            UpdateOne(
+                {"datasource": datasource, "key": key},
+                {"$set": {"post": post, "updated_at": now}},
+                upsert=True,
+            )
+            for key, post in zip(keys, posts)
+            if key is not None
+        ]
+        for i in range(0, len(operations), self._batch_size):
+            await self._posts.objects.bulk_write(
+                operations[i : i + self._batch_size], ordered=False
+            )
+        return keys
+
+    async def save_window(
+        self,
+        window_key: str,
+        datasource: str,
+        since: datetime,
+        until: datetime,
+        limit: int,
+        posts: List[dict],
+    ) -> None:
+        try:
+            keys = await self.save_posts(datasource, posts)
+            now = datetime.utcnow()
+            await self._windows.objects.replace_one(
+                {"_id": window_key},
+                {
+                    "datasource": datasource,
+                    "since": since,
+                    "until": until,
+                    "limit": limit,
+                    "count": len(posts),
+                    "keys": keys,
+                    "unkeyed": [p for k, p in zip(keys, posts) if k is None],
+                    "crawled_at": now,
+                    "expires_at": now + self._window_ttl,
+                },
+                upsert=True,
+            )
+        except (PyMongoError, InvalidDocument) as e:
+            print(f"Failed to store crawled window {window_key}: {e}")
+
+    def schedule_save(self, *args) -> None:
+        """Runs `save_window(*args)` in the background."""
+        task = asyncio.create_task(self.save_window(*args))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def flush(self) -> None:
+        """Waits for the windows still being saved."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+
+    async def load_window(self, window_key: str, max_results: int) -> dict | None:
+        """
+        The stored window as a shard cache entry (`{"limit", "posts"}`), if
+        it was crawled with enough results for `max_results`.
+        """
+        try:
+            window = await self._windows.objects.find_one({"_id": window_key})
+            if window is None or (
+                window["limit"] < max_results and window["count"] >= window["limit"]
+            ):
+                return None
+
+            keys = [key for key in window["keys"] if key is not None]
+            stored = {}
+            cursor = self._posts.objects.find(
+                {"datasource": window["datasource"], "key": {"$in": keys}},
+                {"_id": 0, "key": 1, "post": 1},
+            )
+            async for doc in cursor:
+                stored[doc["key"]] = doc["post"]
+        except PyMongoError as e:
+            print(f"Failed to load crawled window {window_key}: {e}")
+            return None
+
+        if len(stored) < len(set(keys)):
+            # some posts were removed from the store, crawl again
+            return None
+
+        unkeyed = iter(window["unkeyed"])
+        posts = [
+            stored[key] if key is not None else next(unkeyed) for key in window["keys"]
+        ]
+        return {"limit": window["limit"], "posts": posts}
+
+
+post_store = PostStore(
+    PostsCollection(),
+    CrawledWindowsCollection(),
+    batch_size=config.post_store_batch_size,
+    window_ttl=config.post_store_window_ttl_seconds,
+)
@@ -0,0 +1,112 @@
+import asyncio
+import inspect
+from contextlib import asynccontextmanager
+
+from yarapi.config import config
+from yarapi.core.constants import PROCESSOR_MAP, SEARCHER_MAP, resolve_datasources
+from yarapi.models.schemas import DataSource
+
+
+async def _close(obj) -> None:
+    """Closes `obj` through `aclose()` or `close()`, if it has either."""
+    for name in ("aclose", "close"):
+        close = getattr(obj, name, None)
+        if close is None:
+            continue
+        try:
+            result = close()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            print(f"Failed to close {type(obj).__name__}: {e}")
+        return
+
+
+class ProcessorPool:
+    """
+    Long-lived post-processors (and their searchers) per data source, for
+    the profile, comments and timeseries lookups, so their HTTP clients and
+    connection pools are reused instead of being set up on every call.
+    - Each instance is used by one call at a time.
+    - Up to `size` idle instances are kept per data source; when they are
+      all busy an extra one is created and closed after use, so the pool
+      never makes callers wait.
+    - An instance whose call raised is closed instead of being reused.
+    - With `size` 0 every call gets a fresh instance, as before.
+    """
+
+    def __init__(self, size: int):
+        self.size = int(size)
+        self._idle: dict[DataSource, list] = {}
+        self.created = 0
+        self.reused = 0
+        self._closed = False
+
+    @staticmethod
+    def create(datasource: DataSource):
+        if datasource == DataSource.twitter:
+            # X needs a searcher even for lookups that don't search
+            searcher = SEARCHER_MAP[datasource](queries=None, since=None, until=None)
+            return PROCESSOR_MAP[datasource](searcher)
+        return PROCESSOR_MAP[datasource](None)
+
+    @staticmethod
+    async def destroy(post_processor) -> None:
+        await _close(post_processor)
+        searcher = getattr(post_processor, "searcher", None)
+        if searcher is not None:
+            await _close(searcher)
+
+    @asynccontextmanager
+    async def acquire(self, datasource: DataSource):
+        idle = self._idle.setdefault(datasource, [])
+        if idle:
+            post_processor = idle.pop()
+            self.reused += 1
+        else:
+            post_processor = self.create(datasource)
+            self.created += 1
+
+        try:
+            yield post_processor
+        except BaseException:
+            # the call may have left its client broken, don't hand it out again
+            await self.destroy(post_processor)
+            raise
+        if not self._closed and len(idle) < self.size:
+            idle.append(post_processor)
+        else:
+            await self.destroy(post_processor)
+
+    def open(self, datasources=None) -> None:
+        """Pre-creates one instance for each of `datasources` (all by default)."""
+        self._closed = False
+        if self.size <= 0:
+            return
+        for datasource in resolve_datasources(datasources):
+            idle = self._idle.setdefault(datasource, [])
+            if not idle:
+                idle.append(self.create(datasource))
+                self.created += 1
+
+    async def close(self) -> None:
+        self._closed = True
+        idle, self._idle = self._idle, {}
+        await asyncio.gather(
+            *(
+                self.destroy(post_processor)
+                for instances in idle.values()
+                for post_processor in instances
+            )
+        )
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": {ds.value: len(instances) for ds, instances in self._idle.items()},
+            "created": self.created,
+            "reused": self.reused,
+        }
+
+
+processor_pool = ProcessorPool(config.processor_pool_size)
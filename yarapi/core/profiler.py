@@ -0,0 +1,216 @@
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+from yarapi.config import config
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return (
+        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    )
+
+
+def sample_stacks(skip_thread: int | None = None) -> list[str]:
+    """
+    Current stack of every thread in collapsed form (`thread;outer;...;inner`).
+    Covers the event loop thread and the worker threads alike; coroutines
+    suspended in the loop are not on any stack and so are not sampled.
+    """
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks = []
+    for thread_id, frame in sys._current_frames().items():
+        if thread_id == skip_thread:
+            continue
+        labels = []
+        while frame is not None:
+            labels.append(_frame_label(frame))
+            frame = frame.f_back
+        labels.append(names.get(thread_id, f"thread-{thread_id}"))
+        stacks.append(";".join(reversed(labels)))
+    return stacks
+
+
+def collapse(stacks) -> str:
+    """Counts identical stacks, in the format read by flamegraph.pl and speedscope."""
+    counts = Counter(stacks)
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class Sampler:
+    """
+    Samples the stacks of all threads every `interval` seconds from a
+    daemon thread, until stopped.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = float(interval)
+        self.stacks: list[str] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.stacks.extend(sample_stacks(skip_thread=own_id))
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._run, name="yarapi-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return collapse(self.stacks)
+
+
+_profile_lock = threading.Lock()
+
+
+def start_profile(interval: float) -> Sampler:
+    """
+    Starts an on-demand profile. Only one may run at a time, since
+    concurrent samplers would skew each other. Raises `ProfilerBusy`
+    otherwise; `finish_profile` releases it.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    sampler = Sampler(interval)
+    try:
+        sampler.start()
+    except Exception:
+        _profile_lock.release()
+        raise
+    return sampler
+
+
+def finish_profile(sampler: Sampler) -> str:
+    try:
+        return sampler.stop()
+    finally:
+        _profile_lock.release()
+
+
+class SlowRequestProfiler:
+    """
+    Keeps a rolling window of stack samples and, for requests slower than
+    `threshold_ms`, stores the samples taken while they ran.
+    - Samples cover the whole process, so concurrent requests show up too.
+    - Only the last `keep` slow profiles are kept.
+    - Disabled (no sampling thread) when `threshold_ms` is 0.
+    """
+
+    def __init__(self, threshold_ms: float, interval: float, window: float, keep: int):
+        self.threshold = threshold_ms / 1000
+        self.interval = float(interval)
+        self._samples: deque[tuple[float, list[str]]] = deque(
+            maxlen=max(1, int(window / self.interval))
+        )
+        self._profiles: deque[dict] = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = sample_stacks(skip_thread=own_id)
+            with self._lock:
+                self._samples.append((time.monotonic(), stacks))
+
+    def start(self) -> None:
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="yarapi-slow-request-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread = None
+
+    def record(self, method: str, path: str, start: float, end: float) -> None:
+        """Stores a profile if the request took longer than the threshold."""
+        duration = end - start
+        if not self.enabled or duration < self.threshold:
+            return
+        with self._lock:
+            stacks = [
+                stack
+                for timestamp, sample in self._samples
+                if start <= timestamp <= end
+                for stack in sample
+            ]
+            self._profiles.append(
+                {
+                    "id": next(self._ids),
+                    "method": method,
+                    "path": path,
+                    "duration_ms": round(duration * 1000, 1),
+                    "captured_at": time.time(),
+                    "samples": len(stacks),
+                    "collapsed": collapse(stacks),
+                }
+            )
+
+    def list(self) -> list[dict]:
+        with self._lock:
+            return [
+                {k: v for k, v in profile.items() if k != "collapsed"}
+                for profile in self._profiles
+            ]
+
+    def get(self, profile_id: int) -> dict | None:
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+slow_request_profiler = SlowRequestProfiler(
+    threshold_ms=config.profile_slow_request_ms,
+    interval=config.profile_interval_ms / 1000,
+    window=config.profile_slow_window_seconds,
+    keep=config.profile_slow_keep,
+)
+
+
+class SlowRequestMiddleware:
+    """ASGI middleware handing request timings to the slow-request profiler."""
+
+    def __init__(self, app, profiler: SlowRequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.record(
+                scope["method"], scope["path"], start, time.monotonic()
+            )
@@ -0,0 +1,67 @@
+from fastapi import Query
+
+from yarapi.core.cache import CachedPayload
+
+# A projection tree maps field names to their sub-tree, or to None when
+# the whole value is selected.
+FieldTree = dict
+
+
+def parse_fields(fields: str) -> FieldTree | None:
+    """
+    Parses comma-separated, dotted field paths (`id,url,stats.likes`) into
+    a tree. Selecting a field also selects everything below it.
+    """
+    tree: FieldTree = {}
+    for path in fields.split(","):
+        parts = [part for part in path.strip().split(".") if part]
+        if not parts:
+            continue
+        node = tree
+        for part in parts[:-1]:
+            if part in node and node[part] is None:
+                break
+            node = node.setdefault(part, {})
+        else:
+            node[parts[-1]] = None
+    return tree or None
+
+
+def project(value, tree: FieldTree):
+    """
+    Keeps only the fields of `tree`. Lists are projected item by item and
+    missing fields are skipped. Selected values are shared, not copied.
+    """
+    if isinstance(value, list):
+        return [project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: value[key] if sub is None else project(value[key], sub)
+            for key, sub in tree.items()
+            if key in value
+        }
+    return value
+
+
+class Projection:
+    """
+    `fields` query parameter. Results are cached in full and projected
+    only when they are serialized.
+    """
+
+    def __init__(
+        self,
+        fields: str | None = Query(
+            None,
+            description="Comma-separated fields to return, dotted for nested "
+            "fields (e.g. `id,url,timestamp,stats.likes`). All by default.",
+        ),
+    ):
+        self.tree = parse_fields(fields) if fields else None
+
+    def apply(self, data):
+        if self.tree is None:
+            return data
+        if isinstance(data, CachedPayload):
+            data = data.load()
+        return project(data, self.tree)
@@ -0,0 +1,199 @@
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, HTTPException, status
+
+from yarapi.config import config
+from yarapi.core.metrics import registry
+from yarapi.core.security import require_api_user
+from yarapi.models.schemas import DataSource
+from yarapi.models.users import RateLimits, UserInDB
+
+RATE_LIMITED = registry.counter(
+    "yarapi_rate_limited_total",
+    "Requests rejected by per-user quotas, by data source and limit.",
+    ("datasource", "limit"),
+)
+
+
+class RateLimited(Exception):
+    def __init__(self, limit: str, retry_after: int):
+        super().__init__(f"Rate limit exceeded ({limit}), retry in {retry_after}s")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    """
+    Token buckets and in-flight counters per (user, data source).
+    - A bucket holds up to `burst` tokens and refills at
+      `requests_per_minute`; it is refilled lazily when it is used, so
+      every check is O(1).
+    - In-flight counters are dropped once they reach zero.
+    - All state is in this process: with several workers each one
+      enforces the limits on its own.
+    """
+
+    def __init__(self):
+        # key -> [tokens, updated_at]
+        self._buckets: dict[tuple[str, str], list[float]] = {}
+        self._in_flight: dict[tuple[str, str], int] = {}
+
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def take(self, key: tuple[str, str], rate: float, burst: int) -> None:
+        """Takes a token from the bucket of `key` or raises `RateLimited`."""
+        if not rate or not burst:
+            return
+        per_second = rate / 60.0
+        now = self._now()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+        else:
+            bucket[0] = min(float(burst), bucket[0] + (now - bucket[1]) * per_second)
+            bucket[1] = now
+
+        if bucket[0] < 1.0:
+            raise RateLimited(
+                "requests_per_minute", math.ceil((1.0 - bucket[0]) / per_second)
+            )
+        bucket[0] -= 1.0
+
+    def acquire(self, key: tuple[str, str], limit: int) -> None:
+        """Counts one more request of `key` in flight or raises `RateLimited`."""
+        count = self._in_flight.get(key, 0)
+        if limit and count >= limit:
+            raise RateLimited("max_in_flight", 1)
+        self._in_flight[key] = count + 1
+
+    def release(self, key: tuple[str, str]) -> None:
+        count = self._in_flight.get(key, 0) - 1
+        if count > 0:
+            self._in_flight[key] = count
+        else:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "in_flight": sum(self._in_flight.values()),
+        }
+
+
+rate_limiter = RateLimiter()
+
+
+def effective_limits(user: UserInDB, datasource: str) -> RateLimits:
+    """
+    The user's limits for `datasource`: its data source overrides, then
+    its own limits, then the configured defaults.
+    """
+    defaults = RateLimits(
+        requests_per_minute=config.rate_limit_per_minute,
+        burst=config.rate_limit_burst,
+        max_in_flight=config.rate_limit_max_in_flight,
+    )
+    layers = [user.datasource_rate_limits.get(datasource), user.rate_limits, defaults]
+    return RateLimits(
+        **{
+            field: next(
+                getattr(layer, field)
+                for layer in layers
+                if layer is not None and getattr(layer, field) is not None
+            )
+            for field in RateLimits.model_fields
+        }
+    )
+
+
+def too_many_requests(e: RateLimited) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+class Quota:
+    """
+    Rate limits of the current API user on the requested data source.
+    Requests that crawl upstream take a token and an in-flight slot;
+    cache hits take a token too, unless they are exempt. Exceeded limits
+    are reported as `429` with a `Retry-After` header.
+    """
+
+    def __init__(
+        self,
+        datasource: DataSource,
+        user: UserInDB = Depends(require_api_user),
+    ):
+        self.datasource = datasource.value
+        self.key = (user.username, self.datasource)
+        self.limits = effective_limits(user, self.datasource)
+        self.enabled = config.rate_limit_enabled
+        self._acquired = 0
+
+    def _reject(self, e: RateLimited):
+        RATE_LIMITED.inc(datasource=self.datasource, limit=e.limit)
+        raise too_many_requests(e)
+
+    def take(self) -> None:
+        """Takes a token, without holding an in-flight slot."""
+        if not self.enabled:
+            return
+        try:
+            rate_limiter.take(
+                self.key, self.limits.requests_per_minute, self.limits.burst
+            )
+        except RateLimited as e:
+            self._reject(e)
+
+    def hit(self) -> None:
+        """Accounts for a request served from the cache."""
+        if not config.rate_limit_exempt_cache_hits:
+            self.take()
+
+    def acquire(self) -> None:
+        """Holds an in-flight slot until `release`."""
+        if not self.enabled:
+            return
+        try:
+            rate_limiter.acquire(self.key, self.limits.max_in_flight)
+        except RateLimited as e:
+            self._reject(e)
+        self._acquired += 1
+
+    def release(self) -> None:
+        if self._acquired:
+            self._acquired -= 1
+            rate_limiter.release(self.key)
+
+    def begin(self) -> None:
+        """Starts an upstream crawl: an in-flight slot and a token."""
+        self.acquire()
+        try:
+            self.take()
+        except HTTPException:
+            self.release()
+            raise
+
+    @asynccontextmanager
+    async def crawl(self):
+        self.begin()
+        try:
+            yield
+        finally:
+            self.release()
+
+
+def _collect_metrics():
+    stats = rate_limiter.stats()
+    yield "yarapi_rate_limit_in_flight", "gauge", "Requests holding an in-flight slot.", [
+        ({}, stats["in_flight"])
+    ]
+
+
+registry.register_collector(_collect_metrics)
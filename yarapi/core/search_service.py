@@ -1,8 +1,15 @@
-from datetime import datetime
-from typing import List, Dict, Any
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, List, Dict, Any, Tuple
 
 from yarapi.config import config
-from yarapi.core.constants import PROCESSOR_MAP, SITE_MAP, SUFFIX_MAP
+from yarapi.core.cache import inflight, shard_cache
+from yarapi.core.constants import PROCESSOR_MAP, SEARCHER_MAP, SITE_MAP, SUFFIX_MAP
+from yarapi.core.metrics import track_crawl
+from yarapi.core.post_store import post_key, post_store
+from yarapi.core.processor_pool import processor_pool
+from yarapi.core.tracing import tracer
 from yarapi.models.schemas import (
     SearchRequest,
     DataSource,
@@ -10,128 +17,322 @@ from yarapi.models.schemas import (
     CommentsInput,
     TimeseriesInput,
 )
-from yarapi.utils.time import parse_relative_interval
+from yarapi.utils.time import (
+    floor_to_day,
+    get_date_intervals,
+    parse_relative_interval,
+    to_naive_utc,
+)
+
+if TYPE_CHECKING:
+    from open_sea.post_processing.base_serp_postprocessing import (
+        BaseSerpPostProcessing,
+    )
 
-from open_sea.searcher.serp_searcher import SerpSearcher
-from open_sea.searcher.x_searcher import XSearcher
-from open_sea.post_processing.base_serp_postprocessing import BaseSerpPostProcessing
 
-from open_sea.post_processing.x import XPostProcessing
+@contextmanager
+def crawl(post_processor, operation: str):
+    """Traces and meters an upstream call (crawling plus post-processing)."""
+    with (
+        tracer.span(f"crawl.{operation}", processor=type(post_processor).__name__),
+        track_crawl(post_processor, operation),
+    ):
+        yield
 
 
 async def run_profile_search(datasource: DataSource, params: ProfileInput):
     """
     Retrieve a single profile from the specified data source.
     """
-    # Twitter (X) uses a different searcher/post-processor signature
-    if datasource == DataSource.twitter:
-        searcher = XSearcher(
-            queries=None,
-            since=None,
-            until=None,
-        )
-        post_processor = XPostProcessing(searcher)
-
-        result = await post_processor.profile(params.identifier)
-        return result
-
-    # Other sources use their respective post-processing classes
-    post_processor = PROCESSOR_MAP[datasource](None)
-
-    result = await post_processor.profile(params.identifier)
-    return result
+    async with processor_pool.acquire(datasource) as post_processor:
+        with crawl(post_processor, "profile"):
+            return await post_processor.profile(params.identifier)
 
 
 async def run_comments_search(datasource: DataSource, params: CommentsInput):
     """
     Retrieve comments for a given post from the specified data source.
     """
-    if datasource == DataSource.twitter:
-        searcher = XSearcher(
-            queries=None,
-            since=None,
-            until=None,
-        )
-        post_processor = XPostProcessing(searcher)
-
-        results = await post_processor.comments(params.identifier, amount=params.amount)
-        return results
-
-    post_processor: BaseSerpPostProcessing = PROCESSOR_MAP[datasource](None)
-
-    results = await post_processor.comments(params.identifier, amount=params.amount)
-    return results
+    async with processor_pool.acquire(datasource) as post_processor:
+        with crawl(post_processor, "comments"):
+            return await post_processor.comments(
+                params.identifier, amount=params.amount
+            )
 
 
-async def run_search(
-    datasource: DataSource, params: SearchRequest
-) -> List[Dict[str, Any]]:
+def resolve_date_range(params: SearchRequest) -> Tuple[datetime, datetime]:
     """
-    Orchestrates the search and post-processing for the specified data source.
+    Returns the (since, until) range of a search as naive UTC datetimes;
+    `relative_interval` overrides the explicit dates.
     """
-    # 1. Calculate the date range
     if params.relative_interval:
         until_date = datetime.utcnow()
         since_date = until_date - parse_relative_interval(params.relative_interval)
     else:
-        until_date = params.until
-        since_date = params.since
+        until_date = to_naive_utc(params.until)
+        since_date = to_naive_utc(params.since)
+    return since_date, until_date
+
 
+def build_search_processor(
+    datasource: DataSource,
+    params: SearchRequest,
+    queries: List[str],
+    since_date: datetime,
+    until_date: datetime,
+    max_results: int,
+):
+    """
+    Selects the Searcher and Post-Processor for the data source.
+    """
     # Convert dates to the ISO string format expected by the searchers
     since_iso = since_date.isoformat()
     until_iso = until_date.isoformat()
 
-    # 2. Select the Searcher and Post-Processor based on the data source
     if datasource == DataSource.twitter:
-        searcher = XSearcher(
-            queries=params.queries,
+        searcher = SEARCHER_MAP[datasource](
+            queries=queries,
             since=since_iso,
             until=until_iso,
             sort=params.sort,
-            max_results=params.max_results,
+            max_results=max_results,
         )
-        post_processor = XPostProcessing(searcher)
+        return PROCESSOR_MAP[datasource](searcher)
+
+    searcher = SEARCHER_MAP[datasource](
+        queries=queries,
+        site=SITE_MAP[datasource],
+        since=since_iso,
+        until=until_iso,
+        step=params.step_days,
+        max_results=max_results,
+        country=params.country,
+        lang=params.lang,
+        query_suffix=SUFFIX_MAP.get(datasource),
+    )
+    post_processor: "BaseSerpPostProcessing" = PROCESSOR_MAP[datasource](searcher)
+    return post_processor
+
+
+def plan_shards(
+    datasource: DataSource, params: SearchRequest
+) -> List[Tuple[str, datetime, datetime]]:
+    """
+    Splits a search into (query, since, until) shards: one per query and
+    `step_days` window. X paginates by itself, so it is only split by query.
+
+    Windows start at midnight so that overlapping searches produce the
+    same windows and can share cached shards. Their end is exclusive: the
+    next window's start, or `until` for the last one.
+    """
+    since_date, until_date = resolve_date_range(params)
+
+    if datasource == DataSource.twitter:
+        windows = [(since_date, until_date)]
     else:
-        searcher = SerpSearcher(
-            queries=params.queries,
-            site=SITE_MAP[datasource],
-            since=since_iso,
-            until=until_iso,
-            step=params.step_days,
-            max_results=params.max_results,
-            country=params.country,
-            lang=params.lang,
-            query_suffix=SUFFIX_MAP.get(datasource),
+        step = timedelta(days=params.step_days)
+        windows = [
+            (start, min(start + step, until_date))
+            for start, _ in get_date_intervals(
+                floor_to_day(since_date), until_date, params.step_days
+            )
+        ]
+
+    return [
+        (query, since, until) for query in params.queries for since, until in windows
+    ]
+
+
+async def run_shard(
+    datasource: DataSource,
+    params: SearchRequest,
+    query: str,
+    since_date: datetime,
+    until_date: datetime,
+) -> List[Dict[str, Any]]:
+    post_processor = build_search_processor(
+        datasource, params, [query], since_date, until_date, params.max_results
+    )
+    with crawl(post_processor, "search"):
+        return await post_processor.process(
+            raw_output_filename=None, processed_output_filename=None, save_raw=False
         )
 
-        post_processor: BaseSerpPostProcessing = PROCESSOR_MAP[datasource](searcher)
 
-    # 3. Execute the process and capture the results
-    results = await post_processor.process(
-        raw_output_filename=None, processed_output_filename=None, save_raw=False
+BOOLEAN_OPERATORS = {"OR", "AND", "NOT"}
+
+
+def normalize_query(query: str) -> str:
+    """
+    Canonical form of a query for cache keys: collapsed whitespace and
+    case-folded terms. Upper-case boolean operators keep their case since
+    the search engines treat `or` and `OR` differently.
+    """
+    return " ".join(
+        term if term in BOOLEAN_OPERATORS else term.casefold() for term in query.split()
     )
 
-    return results
 
+def shard_cache_key(
+    datasource: DataSource,
+    params: SearchRequest,
+    query: str,
+    since_date: datetime,
+    until_date: datetime,
+) -> str:
+    """
+    A closed window is keyed by its exact end, so a window cut short by
+    `until` never stands in for the full one. The open window is keyed by
+    the day it ends, so searches up to "now" share it until it expires.
+    """
+    if is_closed_window(until_date):
+        until = until_date.isoformat()
+    else:
+        until = until_date.date().isoformat()
+    shard = {
+        "query": normalize_query(query),
+        "since": since_date.date().isoformat(),
+        "until": until,
+        "step_days": params.step_days,
+        "country": params.country.lower(),
+        "lang": params.lang.lower(),
+    }
+    return shard_cache.make_key(f"{datasource.value}:shard", shard)
 
-async def run_timeseries_search(datasource: DataSource, params: TimeseriesInput):
+
+def is_closed_window(until_date: datetime) -> bool:
     """
-    Retrieve comments for a given post from the specified data source.
+    A window (with an exclusive `until_date`) is closed once the whole of
+    its last day is in the past.
+    """
+    last_day = floor_to_day(until_date - timedelta(microseconds=1))
+    return last_day + timedelta(days=1) <= datetime.utcnow()
+
+
+async def run_cached_shard(
+    datasource: DataSource,
+    params: SearchRequest,
+    query: str,
+    since_date: datetime,
+    until_date: datetime,
+) -> List[Dict[str, Any]]:
+    """
+    Runs a shard through the shard cache. A cached shard is reused if it was
+    crawled with at least the same `max_results`, or if it came back with
+    fewer posts than its limit (nothing more to find). Closed windows are
+    kept for `shard_cache_closed_ttl_seconds`, the open one for the default
+    TTL. X shards are not cached since their windows are not aligned.
+    Closed windows are also saved to the post store, in the background,
+    and served from it before going upstream.
     """
     if datasource == DataSource.twitter:
-        post_processor = XPostProcessing(
-            XSearcher(
-                queries=None,
-                since=None,
-                until=None,
-            )
-        )
+        return await run_shard(datasource, params, query, since_date, until_date)
+
+    cache_key = shard_cache_key(datasource, params, query, since_date, until_date)
+    with tracer.span("cache.shard"):
+        cached = await shard_cache.aget(cache_key)
+    if cached is not None and (
+        cached["limit"] >= params.max_results or len(cached["posts"]) < cached["limit"]
+    ):
+        return cached["posts"]
+
+    closed = is_closed_window(until_date)
+    use_store = closed and config.post_store_enabled
+    ttl = config.shard_cache_closed_ttl_seconds if closed else None
 
-        results = await post_processor.timeseries(
-            query=params.query,
-            granularity=params.granularity,
-            since=params.since,
-            until=params.until,
+    async def fetch():
+        if use_store:
+            with tracer.span("store.load"):
+                stored = await post_store.load_window(cache_key, params.max_results)
+            if stored is not None:
+                await shard_cache.aset(cache_key, stored, ttl=ttl)
+                return stored["posts"]
+
+        posts = await run_shard(datasource, params, query, since_date, until_date)
+        await shard_cache.aset(
+            cache_key, {"limit": params.max_results, "posts": posts}, ttl=ttl
         )
+        if use_store:
+            post_store.schedule_save(
+                cache_key,
+                datasource.value,
+                since_date,
+                until_date,
+                params.max_results,
+                posts,
+            )
+        return posts
+
+    return await inflight.do(f"{cache_key}:{params.max_results}", fetch)
 
-        return results
+
+async def iter_search(
+    datasource: DataSource, params: SearchRequest
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Runs the shards of a search concurrently (at most `config.concurrency`
+    at a time), reusing cached shards, and yields each shard's new posts as
+    soon as it completes.
+    - Posts already seen in an earlier shard are dropped.
+    - Stops and cancels the pending shards once `max_results` is reached.
+    """
+    semaphore = asyncio.Semaphore(config.concurrency)
+
+    async def run(shard):
+        async with semaphore:
+            return await run_cached_shard(datasource, params, *shard)
+
+    tasks = [
+        asyncio.ensure_future(run(shard)) for shard in plan_shards(datasource, params)
+    ]
+    seen = set()
+    remaining = params.max_results
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            batch = []
+            for post in await next_done:
+                key = post_key(post)
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                batch.append(post)
+                if len(batch) >= remaining:
+                    break
+
+            remaining -= len(batch)
+            if batch:
+                yield batch
+            if remaining <= 0:
+                break
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def run_search(
+    datasource: DataSource, params: SearchRequest
+) -> List[Dict[str, Any]]:
+    """
+    Orchestrates the search and post-processing for the specified data source.
+    """
+    results = []
+    async for batch in iter_search(datasource, params):
+        results.extend(batch)
+    return results
+
+
+async def run_timeseries_search(datasource: DataSource, params: TimeseriesInput):
+    """
+    Retrieve comments for a given post from the specified data source.
+    """
+    if datasource == DataSource.twitter:
+        async with processor_pool.acquire(datasource) as post_processor:
+            with crawl(post_processor, "timeseries"):
+                return await post_processor.timeseries(
+                    query=params.query,
+                    granularity=params.granularity,
+                    since=params.since,
+                    until=params.until,
+                )
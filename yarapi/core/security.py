@@ -1,11 +1,18 @@
 from fastapi import Depends, HTTPException, Request, status
+from starlette.concurrency import run_in_threadpool
 import base64
+import hashlib
+import hmac
+import os
 from passlib.context import CryptContext
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadTimeSignature
 
-from yarapi.core.database import users_collection
+from yarapi.core.user_cache import user_cache
 from yarapi.models.users import UserInDB
 from yarapi.config import config
+from yarapi.core.cache import LRUTTLCache
+from yarapi.core.metrics import AUTH_DURATION, registry
+from yarapi.core.tracing import tracer
 
 # --- Configuration ---
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -21,13 +28,65 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
+class CredentialCache:
+    """
+    Remembers (username, password) pairs that already passed bcrypt.
+    - Keys are an HMAC-SHA256 digest under a per-process random key, so
+      plaintext passwords are never stored.
+    - Each entry records the hash it was verified against; a changed
+      `hashed_password` on the user invalidates it.
+    - Misses run bcrypt in the thread pool to keep the event loop free.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._store = LRUTTLCache(maxsize=maxsize, default_ttl=ttl)
+        self._key = os.urandom(32)
+        self.hits = 0
+        self.misses = 0
+
+    def _digest(self, username: str, password: str) -> bytes:
+        msg = username.encode("utf-8") + b"\x00" + password.encode("utf-8")
+        return hmac.new(self._key, msg, hashlib.sha256).digest()
+
+    async def verify(self, username: str, password: str, hashed_password: str) -> bool:
+        key = self._digest(username, password)
+        if self._store.get(key) == hashed_password:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        ok = await run_in_threadpool(verify_password, password, hashed_password)
+        if ok:
+            self._store.set(key, hashed_password)
+        return ok
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._store.clear()
+
+
+credential_cache = CredentialCache(
+    maxsize=config.auth_cache_maxsize, ttl=config.auth_cache_ttl_seconds
+)
+
+
+def _collect_metrics():
+    stats = credential_cache.stats()
+    samples = [
+        ({"result": "hit"}, stats["hits"]),
+        ({"result": "miss"}, stats["misses"]),
+    ]
+    yield "yarapi_auth_credential_cache_total", "counter", "Credential cache lookups.", samples
+
+
+registry.register_collector(_collect_metrics)
+
+
 # --- User Retrieval ---
 async def get_user(username: str) -> UserInDB | None:
-    user_data = await users_collection.objects.find_one({"username": username})
-    if user_data:
-        user_data["_id"] = str(user_data["_id"])
-        return UserInDB(**user_data)
-    return None
+    return await user_cache.get(username)
 
 
 # --- API Authentication (HTTP Basic) ---
@@ -56,8 +115,18 @@ async def get_current_api_user(request: Request) -> UserInDB:
                 detail="Invalid authentication header",
             )
 
-        user = await get_user(username)
-        if not user or not verify_password(password, user.hashed_password):
+        with tracer.span("auth.user_lookup"), AUTH_DURATION.time(stage="user_lookup"):
+            user = await get_user(username)
+        verified = False
+        if user:
+            with (
+                tracer.span("auth.password_verify"),
+                AUTH_DURATION.time(stage="password_verify"),
+            ):
+                verified = await credential_cache.verify(
+                    username, password, user.hashed_password
+                )
+        if not verified:
             # Do NOT include WWW-Authenticate header so the browser doesn't
             # trigger the basic auth popup.
             raise HTTPException(
@@ -0,0 +1,159 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from yarapi.config import config
+
+
+class Span:
+    __slots__ = ("name", "attributes", "parent", "start", "end")
+
+    def __init__(self, name: str, attributes: dict, parent: "Span | None"):
+        self.name = name
+        self.attributes = attributes
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.end: float | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000
+
+    def __repr__(self) -> str:
+        return f"Span({self.name!r}, {self.duration_ms:.2f}ms, {self.attributes!r})"
+
+
+class Trace:
+    """Spans finished while handling one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.spans: list[Span] = []
+
+    def server_timing(self) -> str:
+        """
+        Summarizes the spans as a `Server-Timing` header value: the total
+        duration per span name, with the number of spans when there were
+        several (e.g. concurrent shards).
+        """
+        totals: dict[str, list] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.name, [0.0, 0])
+            total[0] += span.duration_ms
+            total[1] += 1
+
+        metrics = []
+        for name, (duration, count) in totals.items():
+            metric = f"{name};dur={duration:.1f}"
+            if count > 1:
+                metric += f';desc="{count} spans"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+class NoopExporter:
+    def export(self, span: Span) -> None:
+        pass
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests."""
+
+    def __init__(self):
+        self.spans: list[Span] = []
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+    def clear(self) -> None:
+        self.spans.clear()
+
+
+class ConsoleExporter:
+    def export(self, span: Span) -> None:
+        parent = span.parent.name if span.parent else "-"
+        print(
+            f"[trace] {span.name} parent={parent} "
+            f"duration={span.duration_ms:.2f}ms {span.attributes}"
+        )
+
+
+_current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Minimal OpenTelemetry-style tracer. Spans nest through context
+    variables, are recorded on the current request's trace (for
+    `Server-Timing`) and handed to the exporter when they end. With the
+    no-op exporter and no request trace, `span` does nothing.
+    """
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter or NoopExporter()
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        trace = _current_trace.get()
+        if trace is None and isinstance(self.exporter, NoopExporter):
+            yield None
+            return
+
+        span = Span(name, attributes, _current_span.get())
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            if trace is not None:
+                trace.spans.append(span)
+            self.exporter.export(span)
+
+
+def build_exporter(name: str):
+    if name == "none":
+        return NoopExporter()
+    if name == "console":
+        return ConsoleExporter()
+    if name == "memory":
+        return InMemoryExporter()
+    raise ValueError(f"Unknown tracing exporter: {name}")
+
+
+tracer = Tracer(build_exporter(config.tracing_exporter))
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a trace per request and, when enabled,
+    reports the spans finished before the response starts in a
+    `Server-Timing` header.
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = Trace()
+
+        async def send_wrapper(message):
+            if self.server_timing and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_trace.reset(token)
@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from pymongo.errors import PyMongoError
+
+from yarapi.config import config
+from yarapi.core.cache import LRUTTLCache
+from yarapi.core.database import BaseCollection, users_collection
+from yarapi.models.users import UserInDB
+
+
+class UserCache:
+    """
+    In-process cache of parsed `UserInDB` objects keyed by username.
+    - Entries are invalidated from a change stream on the users collection.
+    - If change streams are unavailable (e.g. standalone mongod) it falls
+      back to polling the cached users and dropping the ones that changed.
+    - The TTL bounds staleness if both mechanisms are down.
+    """
+
+    def __init__(
+        self,
+        collection: BaseCollection,
+        maxsize: int,
+        ttl: float,
+        poll_interval: float,
+        watch_retry: float = 60.0,
+    ):
+        self._collection = collection
+        self._users = LRUTTLCache(maxsize=maxsize, default_ttl=ttl)
+        self._maxsize = int(maxsize)
+        self._poll_interval = float(poll_interval)
+        self._watch_retry = float(watch_retry)
+        # change events only carry the _id, so remember who it belongs to
+        self._usernames_by_id: dict[str, str] = {}
+        # bumped on every invalidation so in-flight loads can't re-insert
+        # a user that changed while it was being fetched
+        self._generation = 0
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def _parse(user_data: dict) -> UserInDB:
+        user_data["_id"] = str(user_data["_id"])
+        return UserInDB(**user_data)
+
+    async def get(self, username: str) -> UserInDB | None:
+        user = self._users.get(username)
+        if user is not None:
+            return user
+
+        generation = self._generation
+        user_data = await self._collection.objects.find_one({"username": username})
+        if not user_data:
+            return None
+
+        user = self._parse(user_data)
+        if generation == self._generation:
+            self._users.set(username, user)
+            self._remember_id(user.id, username)
+        return user
+
+    def _remember_id(self, user_id: str, username: str) -> None:
+        self._usernames_by_id[user_id] = username
+        if len(self._usernames_by_id) > 2 * self._maxsize:
+            self._usernames_by_id = {
+                i: u for i, u in self._usernames_by_id.items() if self._users.exists(u)
+            }
+
+    def invalidate(self, username: str) -> None:
+        self._generation += 1
+        self._users.pop(username)
+
+    def invalidate_id(self, user_id: str) -> None:
+        self._generation += 1
+        username = self._usernames_by_id.pop(user_id, None)
+        if username is not None:
+            self._users.pop(username)
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._users.clear()
+        self._usernames_by_id.clear()
+
+    # --- Invalidation ---
+    async def _watch(self) -> None:
+        async with self._collection.objects.watch() as stream:
+            async for change in stream:
+                op = change.get("operationType")
+                if op in ("drop", "rename", "dropDatabase", "invalidate"):
+                    self.clear()
+                    return
+                document_key = change.get("documentKey") or {}
+                if "_id" in document_key:
+                    self.invalidate_id(str(document_key["_id"]))
+
+    async def _poll(self) -> None:
+        cached = {u: self._users.get(u) for u in set(self._usernames_by_id.values())}
+        cached = {u: user for u, user in cached.items() if user is not None}
+        if not cached:
+            return
+
+        fresh = {}
+        cursor = self._collection.objects.find({"username": {"$in": list(cached)}})
+        async for user_data in cursor:
+            fresh[user_data["username"]] = self._parse(user_data)
+
+        for username, user in cached.items():
+            if fresh.get(username) != user:
+                self.invalidate(username)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._watch()
+                continue
+            except PyMongoError as e:
+                print(f"User change stream unavailable, polling instead: {e}")
+
+            # events may have been missed while the stream was down
+            self.clear()
+            deadline = time.monotonic() + self._watch_retry
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self._poll_interval)
+                try:
+                    await self._poll()
+                except PyMongoError as e:
+                    print(f"User cache poll failed: {e}")
+                    self.clear()
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+user_cache = UserCache(
+    users_collection,
+    maxsize=config.user_cache_maxsize,
+    ttl=config.user_cache_ttl_seconds,
+    poll_interval=config.user_cache_poll_seconds,
+)
@@ -63,6 +63,33 @@ class SearchResponse(BaseModel):
     status: str = "success"
     results_count: int
     data: List[dict]
+    next_cursor: Optional[str] = Field(
+        None, description="Cursor of the next page, when paginating with `limit`."
+    )
+
+
+class JobStatus(BaseModel):
+    """State of an asynchronous search job."""
+
+    job_id: str
+    datasource: DataSource
+    status: Literal["queued", "running", "succeeded", "failed"]
+    results_count: int = Field(0, description="Posts stored so far.")
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    expires_at: datetime
+
+
+class JobResultsResponse(SearchResponse):
+    """A page of the results of an asynchronous search job."""
+
+    job_status: Literal["queued", "running", "succeeded", "failed"]
+    offset: int
+    next_offset: Optional[int] = Field(
+        None, description="Offset of the next page, if there may be more results."
+    )
 
 
 class ProfileInput(BaseModel):
@@ -87,6 +114,55 @@ class CommentsInput(BaseModel):
     amount: int = Field(10, gt=0, description="Number of comments to retrieve")
 
 
+class ProfilesBatchInput(BaseModel):
+    """Model for the batch profile endpoint input.
+
+    - identifiers: usernames or urls
+    """
+
+    identifiers: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Usernames or profile URLs to look up (at most 500).",
+    )
+
+
+class CommentsBatchInput(BaseModel):
+    """Model for the batch comments endpoint input.
+
+    - identifiers: post ids or post urls
+    - amount: number of comments to retrieve per post
+    """
+
+    identifiers: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=500,
+        description="Post IDs or post URLs for comments lookup (at most 500).",
+    )
+    amount: int = Field(10, gt=0, description="Number of comments to retrieve")
+
+
+class BatchItem(BaseModel):
+    """Result of one identifier of a batch request."""
+
+    identifier: str
+    status: Literal["success", "error"]
+    cache: Optional[Literal["HIT", "STALE", "MISS"]] = None
+    data: Optional[List[dict] | dict] = None
+    detail: Optional[str] = None
+
+
+class BatchResponse(BaseModel):
+    """Batch API response model."""
+
+    status: str = "success"
+    results_count: int
+    errors_count: int
+    data: List[BatchItem]
+
+
 class TimeseriesInput(BaseModel):
     """Model for timeseries endpoint input.
 
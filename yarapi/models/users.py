@@ -1,9 +1,24 @@
+from typing import Dict
+
 from pydantic import BaseModel, Field
 
+class RateLimits(BaseModel):
+    """
+    Per-user request quotas; unset fields fall back to the configured
+    defaults and 0 disables a limit.
+    """
+
+    requests_per_minute: float | None = None
+    burst: int | None = None
+    max_in_flight: int | None = None
+
 class UserModel(BaseModel):
     username: str
     hashed_password: str
     permissions: str
+    # limits for every data source, and overrides for some of them
+    rate_limits: RateLimits = Field(default_factory=RateLimits)
+    datasource_rate_limits: Dict[str, RateLimits] = Field(default_factory=dict)
 
 class UserInDB(UserModel):
     id: str = Field(alias="_id")
@@ -0,0 +1,109 @@
+import os
+import signal
+import time
+from typing import Callable
+
+import uvicorn
+
+from yarapi.config import config
+from yarapi.core.constants import warm_up
+
+APP = "main:app"
+
+# a worker dying sooner than this after starting is restarted with a delay
+MIN_WORKER_UPTIME_SECONDS = 1.0
+
+
+def uvicorn_config(app: str | Callable = APP) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=config.host,
+        port=config.port,
+        loop=config.uvicorn_loop,
+        http=config.uvicorn_http,
+        backlog=config.uvicorn_backlog,
+        timeout_keep_alive=config.uvicorn_keep_alive_seconds,
+        timeout_graceful_shutdown=config.graceful_shutdown_seconds,
+    )
+
+
+class ForkSupervisor:
+    """
+    Forks `workers` uvicorn servers sharing one socket and restarts the
+    ones that die. SIGTERM/SIGINT are forwarded to the workers, which stop
+    gracefully (in-flight requests get `graceful_shutdown_seconds`).
+    """
+
+    def __init__(self, server_config: uvicorn.Config, workers: int):
+        self.server_config = server_config
+        self.workers = workers
+        self.children: dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                uvicorn.Server(self.server_config).run(sockets=[self.socket])
+            except BaseException as e:
+                print(f"Worker {os.getpid()} crashed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self.children[pid] = time.monotonic()
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        self.socket = self.server_config.bind_socket()
+        for _ in range(self.workers):
+            self.spawn()
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            started = self.children.pop(pid, None)
+            if self.stopping or started is None:
+                continue
+            print(f"Worker {pid} exited with status {status}, restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME_SECONDS:
+                time.sleep(MIN_WORKER_UPTIME_SECONDS)
+            self.spawn()
+        self.socket.close()
+
+
+def serve(app: str = APP) -> None:
+    """
+    Production entry point (`python -m yarapi.server`).
+    - With `WEB_CONCURRENCY` > 1 the socket is bound once and the workers
+      are forked after the `PRELOAD_DATASOURCES` scrapers are imported,
+      sharing those pages copy-on-write.
+    - The app, and with it the Mongo clients, is only imported inside each
+      worker, since pymongo clients are not fork-safe.
+    """
+    server_config = uvicorn_config(app)
+    workers = config.web_concurrency
+    if workers <= 1 or not hasattr(os, "fork"):
+        uvicorn.Server(server_config).run()
+        return
+
+    if config.preload_datasources:
+        warm_up(config.preload_datasources)
+    ForkSupervisor(server_config, workers).run()
+
+
+if __name__ == "__main__":
+    serve()
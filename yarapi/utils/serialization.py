@@ -0,0 +1,18 @@
+from datetime import datetime
+
+import orjson
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return str(obj)
+
+
+def dumps(obj) -> bytes:
+    """Serializes JSON-like data to UTF-8 bytes."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def loads(data: bytes | str):
+    return orjson.loads(data)
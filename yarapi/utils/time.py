@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import re
 
 
@@ -21,6 +21,18 @@ def parse_relative_interval(interval_str: str) -> timedelta:
     raise ValueError(f"Unknown time unit in interval string: {unit}")
 
 
+def to_naive_utc(date: datetime) -> datetime:
+    """Converts a timezone-aware datetime to naive UTC; naive ones are kept."""
+    if date.tzinfo is None:
+        return date
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def floor_to_day(date: datetime) -> datetime:
+    """Truncates a datetime to midnight of the same day."""
+    return date.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
 def get_date_intervals(
     start_date: datetime, end_date: datetime, step_days: int
 ) -> list[tuple[datetime, datetime]]: